@@ -1,788 +1,1273 @@
-import sqlite3
-from tkinter import *
-from tkinter import messagebox
-
-conn = sqlite3.connect('rpg_characters.db')
-c = conn.cursor()
-
-# Character Table
-c.execute('''CREATE TABLE IF NOT EXISTS characters (
-             id INTEGER PRIMARY KEY AUTOINCREMENT,
-             name TEXT NOT NULL,
-             description TEXT NOT NULL,
-             level INTEGER DEFAULT 1)''')
-
-# Armor Table
-c.execute('''CREATE TABLE IF NOT EXISTS armors (
-             id INTEGER PRIMARY KEY AUTOINCREMENT,
-             name TEXT NOT NULL,
-             description TEXT NOT NULL,
-             bonus INTEGER DEFAULT 0)''')
-
-# Character_Armor Joint Table
-c.execute('''CREATE TABLE IF NOT EXISTS character_armor (
-             character_id INTEGER,
-             armor_id INTEGER,
-             FOREIGN KEY(character_id) REFERENCES characters(id),
-             FOREIGN KEY(armor_id) REFERENCES armors(id))''')
-
-# Monster Table
-c.execute('''CREATE TABLE IF NOT EXISTS monsters (
-             id INTEGER PRIMARY KEY AUTOINCREMENT,
-             name TEXT NOT NULL,
-             description TEXT NOT NULL,
-             battle_power INTEGER DEFAULT 1)''')
-
-conn.commit()
-
-root = Tk()
-root.title("Tabletop RPG Manager")
-root.geometry("1200x1000")
-
-# Canvas and Scrollbar
-canvas = Canvas(root)
-canvas.pack(side=LEFT, fill=BOTH, expand=True)
-
-scrollbar = Scrollbar(root, orient=VERTICAL, command=canvas.yview)
-scrollbar.pack(side=RIGHT, fill=Y)
-
-canvas.configure(yscrollcommand=scrollbar.set)
-canvas.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-
-main_frame = Frame(canvas)
-canvas.create_window((0, 0), window=main_frame, anchor="nw")
-
-# Initiate Lists
-selected_characters = []
-selected_armors = []
-selected_battle_characters = []
-selected_battle_monsters = []
-
-#Character Functions
-def addCharacter():
-    name = entryName.get()
-    description = entryDescription.get("1.0", END)
-    level = int(levelSpinbox.get())
-
-    if name and description.strip():
-        c.execute("INSERT INTO characters (name, description, level) VALUES (?, ?, ?)",
-                  (name, description.strip(), level))
-        conn.commit()
-        messagebox.showinfo("Success", "Character added!")
-
-        # Clear input fields
-        entryName.delete(0, END)
-        entryDescription.delete("1.0", END)
-        levelSpinbox.delete(0, "end")
-        levelSpinbox.insert(0, "1")
-
-        refreshCharacterList()
-    else:
-        messagebox.showwarning("Input Error", "Please provide both name and description.")
-
-def deleteCharacter():
-    try:
-        selectedCharacter = listboxCharacters.get(listboxCharacters.curselection())
-        c.execute("DELETE FROM characters WHERE name=?", (selectedCharacter,))
-        conn.commit()
-        messagebox.showinfo("Success", "Character deleted!")
-        refreshCharacterList()
-    except:
-        messagebox.showwarning("Delete Error", "Please select a character to delete.")
-
-def loadCharacter(event):
-    try:
-        selectedCharacter = listboxCharacters.get(listboxCharacters.curselection())
-        c.execute("SELECT name, description, level FROM characters WHERE name=?", (selectedCharacter,))
-        character = c.fetchone()
-
-        if character:
-            entryName.delete(0, END)
-            entryName.insert(END, character[0])
-
-            entryDescription.delete("1.0", END)
-            entryDescription.insert(END, character[1])
-
-            levelSpinbox.delete(0, "end")
-            levelSpinbox.insert(0, character[2])
-
-            # Fetch character equipment
-            c.execute('''SELECT armors.name, armors.bonus FROM armors
-                                     JOIN character_armor ON armors.id = character_armor.armor_id
-                                     JOIN characters ON characters.id = character_armor.character_id
-                                     WHERE characters.name=?''', (selectedCharacter,))
-            equipped_armors = c.fetchall()
-
-            if equipped_armors:
-                armor_names = [armor[0] for armor in equipped_armors]
-                total_bonus = sum(armor[1] for armor in equipped_armors)
-                battlePower = int(character[2]) + total_bonus
-                labelEquippedArmor.config(text=f"Equipment: {', '.join(armor_names)}")
-                labelBattlePower.config(text=f"Battle Power: {battlePower}")
-                updateEquipList(equipped_armors)
-            else:
-                labelEquippedArmor.config(text="Equipment: None")
-                labelBattlePower.config(text="Battle Power: {}".format(character[2]))
-                updateEquipList([])
-
-    except:
-        pass
-
-def refreshCharacterList():
-    listboxCharacters.delete(0, END)
-    c.execute("SELECT name FROM characters")
-    characters = c.fetchall()
-    for character in characters:
-        listboxCharacters.insert(END, character[0])
-
-def updateCharacterLevel(level):
-    try:
-        if level.strip() == "":
-            return
-        selectedCharacter = listboxCharacters.get(listboxCharacters.curselection())
-        c.execute("UPDATE characters SET level=? WHERE name=?", (int(level), selectedCharacter))
-        conn.commit()
-    except ValueError:
-        messagebox.showwarning("Update Error", "Please enter a valid integer for character level.")
-    except Exception as e:
-        messagebox.showwarning("Update Error", f"Error updating character level: {e}")
-
-def updateCharacterBattlePower():
-    try:
-        selected_index = listboxCharacters.curselection()
-        if not selected_index:
-            return
-
-        selectedCharacter = listboxCharacters.get(selected_index[0])
-
-        c.execute("SELECT level FROM characters WHERE name=?", (selectedCharacter,))
-        character_level = c.fetchone()[0]
-
-        c.execute('''SELECT SUM(armors.bonus) FROM armors
-                     JOIN character_armor ON armors.id = character_armor.armor_id
-                     JOIN characters ON characters.id = character_armor.character_id
-                     WHERE characters.name=?''', (selectedCharacter,))
-        total_bonus = c.fetchone()[0] or 0
-
-        battle_power = character_level + total_bonus
-        labelBattlePower.config(text=f"Battle Power: {battle_power}")
-    except Exception as e:
-        messagebox.showwarning("Error", f"Failed to update battle power: {e}")
-
-def searchCharacter(event):
-    query = entrySearchCharacter.get().lower()
-    listboxCharacters.delete(0, END)
-    c.execute("SELECT name FROM characters WHERE LOWER(name) LIKE ?", (f'%{query}%',))
-    characters = c.fetchall()
-    for character in characters:
-        listboxCharacters.insert(END, character[0])
-
-# Armor Functions
-def addArmor():
-    name = entryArmorName.get()
-    description = entryArmorDescription.get("1.0", END)
-    bonus = int(bonusSpinbox.get())
-
-    if name and description.strip():
-        c.execute("INSERT INTO armors (name, description, bonus) VALUES (?, ?, ?)",
-                  (name, description.strip(), bonus))
-        conn.commit()
-        messagebox.showinfo("Success", "Equipment added!")
-
-        # Clear input fields
-        entryArmorName.delete(0, END)
-        entryArmorDescription.delete("1.0", END)
-        bonusSpinbox.delete(0, "end")
-        bonusSpinbox.insert(0, "0")
-
-        refreshArmorList()
-    else:
-        messagebox.showwarning("Input Error", "Please provide both name and description.")
-
-
-def deleteArmor():
-    try:
-        selectedArmor = listboxArmors.get(listboxArmors.curselection())
-        c.execute("DELETE FROM armors WHERE name=?", (selectedArmor,))
-        conn.commit()
-        messagebox.showinfo("Success", "equipment deleted!")
-        refreshArmorList()
-    except:
-        messagebox.showwarning("Delete Error", "Please select an item to delete.")
-
-def loadArmor(event):
-    try:
-        selectedArmor = listboxArmors.get(listboxArmors.curselection())
-        c.execute("SELECT name, description, bonus FROM armors WHERE name=?", (selectedArmor,))
-        armor = c.fetchone()
-
-        if armor:
-            entryArmorName.delete(0, END)
-            entryArmorName.insert(END, armor[0])
-
-            entryArmorDescription.delete("1.0", END)
-            entryArmorDescription.insert(END, armor[1])
-
-            bonusSpinbox.delete(0, "end")
-            bonusSpinbox.insert(0, armor[2])
-    except:
-        pass
-
-
-def refreshArmorList():
-    listboxArmors.delete(0, END)
-    c.execute("SELECT name FROM armors")
-    armors = c.fetchall()
-    for armor in armors:
-        listboxArmors.insert(END, armor[0])
-
-def updateArmorBonus(bonus):
-    try:
-        if bonus.strip() == "":
-            return
-
-        selected_index = listboxArmors.curselection()
-        if not selected_index:
-            return
-
-        selectedArmor = listboxArmors.get(selected_index[0])
-
-        c.execute("UPDATE armors SET bonus=? WHERE name=?", (int(bonus), selectedArmor))
-        conn.commit()
-    except ValueError:
-        messagebox.showwarning("Update Error", "Please enter a valid integer for armor bonus.")
-    except Exception as e:
-        messagebox.showwarning("Update Error", f"Error updating armor bonus: {e}")
-
-def searchArmor(event):
-    query = entrySearchArmor.get().lower()
-    listboxArmors.delete(0, END)
-    c.execute("SELECT name FROM armors WHERE LOWER(name) LIKE ?", (f'%{query}%',))
-    armors = c.fetchall()
-    for armor in armors:
-        listboxArmors.insert(END, armor[0])
-
-# Equip Functions
-def addCharacterToEquip():
-    try:
-        selectedCharacter = listboxCharacters.get(listboxCharacters.curselection())
-        if selectedCharacter not in selected_characters:
-            selected_characters.append(selectedCharacter)
-            messagebox.showinfo("Success", f"{selectedCharacter} added to equip list!")
-        refreshEquipList()
-    except:
-        messagebox.showwarning("Selection Error", "Please select a character to add.")
-
-def addArmorToEquip():
-    try:
-        selectedArmor = listboxArmors.get(listboxArmors.curselection())
-        if selectedArmor not in selected_armors:
-            selected_armors.append(selectedArmor)
-            messagebox.showinfo("Success", f"{selectedArmor} added to equip list!")
-        refreshEquipList()
-    except:
-        messagebox.showwarning("Selection Error", "Please select equipment to add.")
-
-# Equip armor
-def equipAll():
-    if not selected_characters or not selected_armors:
-        messagebox.showwarning("Equip Error", "Please add both characters and equipment to equip.")
-        return
-
-    for character in selected_characters:
-        for armor in selected_armors:
-
-            c.execute("SELECT id FROM characters WHERE name=?", (character,))
-            character_id = c.fetchone()[0]
-
-            c.execute("SELECT id FROM armors WHERE name=?", (armor,))
-            armor_id = c.fetchone()[0]
-
-            c.execute("INSERT INTO character_armor (character_id, armor_id) VALUES (?, ?)", (character_id, armor_id))
-            conn.commit()
-
-    messagebox.showinfo("Success", "All selected characters have equipped all selected equipment!")
-    refreshCharacterList()
-    selected_characters.clear()
-    selected_armors.clear()
-    refreshEquipList()
-
-def unequipAll():
-    if not selected_characters or not selected_armors:
-        messagebox.showwarning("Unequip Error", "Please add both characters and equipment to unequip.")
-        return
-
-    for character in selected_characters:
-        for armor in selected_armors:
-
-            c.execute("SELECT id FROM characters WHERE name=?", (character,))
-            character_id = c.fetchone()[0]
-
-            c.execute("SELECT id FROM armors WHERE name=?", (armor,))
-            armor_id = c.fetchone()[0]
-
-            c.execute("DELETE FROM character_armor WHERE character_id=? AND armor_id=?", (character_id, armor_id))
-            conn.commit()
-
-    messagebox.showinfo("Success", "All selected characters have unequipped all selected equipment!")
-    refreshCharacterList()
-    selected_characters.clear()
-    selected_armors.clear()
-    refreshEquipList()
-
-def refreshEquipList():
-    listboxEquip.delete(0, END)
-    if selected_characters:
-        listboxEquip.insert(END, "Characters to Equip:")
-        for character in selected_characters:
-            listboxEquip.insert(END, f" - {character}")
-    if selected_armors:
-        listboxEquip.insert(END, "Equipment to Equip:")
-        for armor in selected_armors:
-            listboxEquip.insert(END, f" - {armor}")
-
-def updateEquipList(equipped_armors):
-    listboxEquip.delete(0, END)
-    for armor in equipped_armors:
-        listboxEquip.insert(END, armor[0])
-
-def clearEquipList():
-    selected_characters.clear()
-    selected_armors.clear()
-    refreshEquipList()
-    messagebox.showinfo("Success", "Equip list cleared!")
-
-# Monster Functions
-def addMonster():
-    name = entryMonsterName.get()
-    description = entryMonsterDescription.get("1.0", END)
-    battle_power = int(battlePowerSpinbox.get())
-
-    if name and description.strip():
-        c.execute("INSERT INTO monsters (name, description, battle_power) VALUES (?, ?, ?)",
-                  (name, description.strip(), battle_power))
-        conn.commit()
-        messagebox.showinfo("Success", "Monster added!")
-
-        entryMonsterName.delete(0, END)
-        entryMonsterDescription.delete("1.0", END)
-        battlePowerSpinbox.delete(0, "end")
-        battlePowerSpinbox.insert(0, "1")
-
-        refreshMonsterList()
-    else:
-        messagebox.showwarning("Input Error", "Please provide both name and description.")
-
-def deleteMonster():
-    try:
-        selectedMonster = listboxMonsters.get(listboxMonsters.curselection())
-        c.execute("DELETE FROM monsters WHERE name=?", (selectedMonster,))
-        conn.commit()
-        messagebox.showinfo("Success", "Monster deleted!")
-        refreshMonsterList()
-    except:
-        messagebox.showwarning("Delete Error", "Please select a monster to delete.")
-
-def loadMonster(event):
-    try:
-        selectedMonster = listboxMonsters.get(listboxMonsters.curselection())
-        c.execute("SELECT name, description, battle_power FROM monsters WHERE name=?", (selectedMonster,))
-        monster = c.fetchone()
-
-        if monster:
-            entryMonsterName.delete(0, END)
-            entryMonsterName.insert(END, monster[0])
-
-            entryMonsterDescription.delete("1.0", END)
-            entryMonsterDescription.insert(END, monster[1])
-
-            battlePowerSpinbox.delete(0, "end")
-            battlePowerSpinbox.insert(0, monster[2])
-
-    except Exception as e:
-        print(f"Error loading monster: {e}")
-
-def refreshMonsterList():
-    listboxMonsters.delete(0, END)
-    c.execute("SELECT name FROM monsters")
-    monsters = c.fetchall()
-    for monster in monsters:
-        listboxMonsters.insert(END, monster[0])
-
-def updateMonsterPower(power):
-    try:
-        if power.strip() == "":
-            return
-        selectedMonster = listboxMonsters.get(listboxMonsters.curselection())
-        c.execute("UPDATE monsters SET battle_power=? WHERE name=?", (int(power), selectedMonster))
-        conn.commit()
-    except ValueError:
-        messagebox.showwarning("Update Error", "Please enter a valid integer for monster power.")
-    except Exception as e:
-        messagebox.showwarning("Update Error", f"Error updating monster power: {e}")
-
-
-def searchMonster(event):
-    query = entrySearchMonster.get().lower()
-    listboxMonsters.delete(0, END)
-    c.execute("SELECT name FROM monsters WHERE LOWER(name) LIKE ?", (f'%{query}%',))
-    monsters = c.fetchall()
-    for monster in monsters:
-        listboxMonsters.insert(END, monster[0])
-
-# Battle Menu
-def addCharacterToBattle():
-    try:
-        selectedCharacter = listboxCharacters.get(listboxCharacters.curselection())
-        if selectedCharacter not in selected_battle_characters:
-            selected_battle_characters.append(selectedCharacter)
-            messagebox.showinfo("Success", f"{selectedCharacter} added to battle!")
-        refreshBattleList()
-    except:
-        messagebox.showwarning("Selection Error", "Please select a character to add.")
-
-def addMonsterToBattle():
-    try:
-        selectedMonster = listboxMonsters.get(listboxMonsters.curselection())
-        if selectedMonster not in selected_battle_monsters:
-            selected_battle_monsters.append(selectedMonster)
-            messagebox.showinfo("Success", f"{selectedMonster} added to battle!")
-        refreshBattleList()
-    except:
-        messagebox.showwarning("Selection Error", "Please select a monster to add.")
-
-def refreshBattleList():
-    listboxBattle.delete(0, END)
-    if selected_battle_characters:
-        listboxBattle.insert(END, "Characters in Battle:")
-        for character in selected_battle_characters:
-            listboxBattle.insert(END, f" - {character}")
-    if selected_battle_monsters:
-        listboxBattle.insert(END, "Monsters in Battle:")
-        for monster in selected_battle_monsters:
-            listboxBattle.insert(END, f" - {monster}")
-
-def calculateBattle():
-    char_total = sum(fetchBattlePower(name, "characters") for name in selected_battle_characters)
-    monster_total = sum(fetchBattlePower(name, "monsters") for name in selected_battle_monsters)
-
-    char_modifier = int(charModifierSpinbox.get())
-    monster_modifier = int(monModifierSpinbox.get())
-
-    final_char_power = char_total + char_modifier
-    final_monster_power = monster_total + monster_modifier
-
-    if final_char_power > final_monster_power:
-        result = "Characters Win!"
-    elif final_monster_power > final_char_power:
-        result = "Monsters Win!"
-    else:
-        result = "It's a Draw!"
-
-    messagebox.showinfo("Battle Result", f"{result}\n"
-                                         f"Characters: {final_char_power}\n"
-                                         f"Monsters: {final_monster_power}")
-
-def fetchBattlePower(name, table):
-    if table == "characters":
-        c.execute("SELECT level FROM characters WHERE name=?", (name,))
-        character_level = c.fetchone()[0]
-
-        c.execute('''SELECT SUM(armors.bonus) FROM armors
-                     JOIN character_armor ON armors.id = character_armor.armor_id
-                     JOIN characters ON characters.id = character_armor.character_id
-                     WHERE characters.name=?''', (name,))
-        total_bonus = c.fetchone()[0] or 0
-
-        return character_level + total_bonus
-
-    elif table == "monsters":
-        c.execute("SELECT battle_power FROM monsters WHERE name=?", (name,))
-        return c.fetchone()[0]
-
-def clearBattleList():
-    selected_battle_characters.clear()
-    selected_battle_monsters.clear()
-    refreshBattleList()
-    messagebox.showinfo("Success", "Battle list cleared!")
-
-# GUI
-# Character Frame
-frameCharacters = LabelFrame(main_frame, text="Characters", padx=10, pady=10)
-frameCharacters.pack(side=LEFT, fill=BOTH, expand=True)
-
-labelName = Label(frameCharacters, text="Character Name:")
-labelName.pack(pady=5)
-entryName = Entry(frameCharacters)
-entryName.pack(pady=5, fill=X)
-
-# character description
-labelDescription = Label(frameCharacters, text="Character Description:")
-labelDescription.pack(pady=5)
-entryDescription = Text(frameCharacters, height=5, width=30)
-entryDescription.pack(pady=5, fill=X)
-
-# Character Level and battle power update
-level_var = StringVar(value="0")
-labelLevel = Label(frameCharacters, text="Character Level:")
-labelLevel.pack(pady=5)
-levelSpinbox = Spinbox(
-    frameCharacters, from_=-100, to=10000, textvariable=level_var
-)
-levelSpinbox.pack(pady=5, fill=X)
-level_var.trace("w", lambda *args: [updateCharacterLevel(level_var.get()), updateCharacterBattlePower()])
-
-# Add and Delete Character buttons
-btnAddCharacter = Button(frameCharacters, text="Add Character", command=addCharacter)
-btnAddCharacter.pack(pady=10)
-
-btnDeleteCharacter = Button(frameCharacters, text="Delete Character", command=deleteCharacter)
-btnDeleteCharacter.pack(pady=5)
-
-labelListCharacters = Label(frameCharacters, text="Character List")
-labelListCharacters.pack(pady=5)
-
-# Character List Frame
-frameCharacterList = Frame(frameCharacters)
-frameCharacterList.pack(pady=5, fill=BOTH, expand=True)
-
-# Character Scrollbar
-scrollbarCharacters = Scrollbar(frameCharacterList)
-scrollbarCharacters.pack(side=RIGHT, fill=Y)
-
-listboxCharacters = Listbox(frameCharacterList, yscrollcommand=scrollbarCharacters.set)
-listboxCharacters.pack(pady=5, fill=BOTH, expand=True)
-listboxCharacters.bind('<<ListboxSelect>>', loadCharacter)
-
-scrollbarCharacters.config(command=listboxCharacters.yview)
-
-# Add character to Equip menu
-btnAddCharacterToEquip = Button(frameCharacters, text="Add to Equip", command=addCharacterToEquip)
-btnAddCharacterToEquip.pack(pady=5)
-
-# Equipped Items
-labelEquippedArmor = Label(frameCharacters, text="Equipped items: None")
-labelEquippedArmor.pack(pady=5)
-
-# Battle Power
-labelBattlePower = Label(frameCharacters, text="Battle Power: 0")
-labelBattlePower.pack(pady=5)
-
-# Equipment Frame
-frameArmors = LabelFrame(main_frame, text="Equipment", padx=10, pady=10)
-frameArmors.pack(side=LEFT, fill=BOTH, expand=True)
-
-labelArmorName = Label(frameArmors, text="Equipment Name:")
-labelArmorName.pack(pady=5)
-entryArmorName = Entry(frameArmors)
-entryArmorName.pack(pady=5, fill=X)
-
-# Equipment Description
-labelArmorDescription = Label(frameArmors, text="Equipment Description:")
-labelArmorDescription.pack(pady=5)
-entryArmorDescription = Text(frameArmors, height=5, width=30)
-entryArmorDescription.pack(pady=5, fill=X)
-
-# Equipment Bonus and real time battle power update
-armor_bonus_var = StringVar(value="0")
-labelArmorBonus = Label(frameArmors, text="Equipment Bonus:")
-labelArmorBonus.pack(pady=5)
-bonusSpinbox = Spinbox(
-    frameArmors, from_=-10000, to=10000, textvariable=armor_bonus_var
-)
-bonusSpinbox.pack(pady=5, fill=X)
-
-armor_bonus_var.trace("w", lambda *args: [updateArmorBonus(armor_bonus_var.get()), updateCharacterBattlePower()])
-
-# Add and Delete Armor buttons
-btnAddArmor = Button(frameArmors, text="Add Equipment", command=addArmor)
-btnAddArmor.pack(pady=10)
-
-btnDeleteArmor = Button(frameArmors, text="Delete Equipment", command=deleteArmor)
-btnDeleteArmor.pack(pady=5)
-
-labelListArmors = Label(frameArmors, text="Equipment List")
-labelListArmors.pack(pady=5)
-
-# Equipment List Frame
-frameArmorList = Frame(frameArmors)
-frameArmorList.pack(pady=5, fill=BOTH, expand=True)
-
-# SEquipment Scrollbar
-scrollbarArmors = Scrollbar(frameArmorList)
-scrollbarArmors.pack(side=RIGHT, fill=Y)
-
-listboxArmors = Listbox(frameArmorList, yscrollcommand=scrollbarArmors.set)
-listboxArmors.pack(pady=5, fill=BOTH, expand=True)
-
-scrollbarArmors.config(command=listboxArmors.yview)
-
-listboxArmors.bind('<<ListboxSelect>>', loadArmor)
-
-# Add Equipment to Equip Menu
-btnAddArmorToEquip = Button(frameArmors, text="Add to Equip", command=addArmorToEquip)
-btnAddArmorToEquip.pack(pady=5)
-
-# Equip List Frame
-frameEquipList = LabelFrame(main_frame, text="Equip List", padx=10, pady=10)
-frameEquipList.pack(side=LEFT, fill=BOTH, expand=True, padx=5, pady=5)
-
-frameEquipButtons = Frame(frameEquipList)
-frameEquipButtons.grid(row=0, column=0, columnspan=2, pady=(0, 5))
-
-# Equip All Button
-btnEquipAll = Button(frameEquipButtons, text="Equip All", command=equipAll)
-btnEquipAll.grid(row=0, column=0, padx=5)
-
-# Unequip All Button
-btnUnequipAll = Button(frameEquipButtons, text="Unequip All", command=unequipAll)
-btnUnequipAll.grid(row=0, column=1, padx=5)
-
-listboxEquip = Listbox(frameEquipList)
-listboxEquip.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
-
-scrollbarEquip = Scrollbar(frameEquipList, orient=VERTICAL, command=listboxEquip.yview)
-scrollbarEquip.grid(row=1, column=1, sticky="ns", pady=5)
-
-listboxEquip.config(yscrollcommand=scrollbarEquip.set)
-
-frameEquipList.grid_rowconfigure(1, weight=1)
-frameEquipList.grid_columnconfigure(0, weight=1)
-
-# Clear Equip List Button
-btnClearEquip = Button(frameEquipList, text="Clear Equip List", command=clearEquipList)
-btnClearEquip.grid(row=2, column=0, columnspan=2, pady=(5, 0))
-
-# Monster Frame
-frameMonsters = LabelFrame(main_frame, text="Monsters", padx=10, pady=10)
-frameMonsters.pack(side=LEFT, fill=BOTH, expand=True, padx=5, pady=5)
-
-# Monster Name Input
-labelMonsterName = Label(frameMonsters, text="Monster Name:")
-labelMonsterName.pack(pady=5)
-entryMonsterName = Entry(frameMonsters)
-entryMonsterName.pack(pady=5, fill=X)
-
-# Monster Description Input
-labelMonsterDescription = Label(frameMonsters, text="Monster Description:")
-labelMonsterDescription.pack(pady=5)
-entryMonsterDescription = Text(frameMonsters, height=5, width=30)
-entryMonsterDescription.pack(pady=5, fill=X)
-
-# Monster Battle Power Input
-monster_power_var = StringVar(value=0)
-labelMonsterPower = Label(frameMonsters, text="Monster Battle Power:")
-labelMonsterPower.pack(pady=5)
-battlePowerSpinbox = Spinbox(frameMonsters, from_=0, to=10000, textvariable=monster_power_var)
-battlePowerSpinbox.pack(pady=5, fill=X)
-monster_power_var.trace("w", lambda *args: updateMonsterPower(monster_power_var.get()))
-
-# Add and Delete Monster Buttons
-btnAddMonster = Button(frameMonsters, text="Add Monster", command=addMonster)
-btnAddMonster.pack(pady=10)
-
-btnDeleteMonster = Button(frameMonsters, text="Delete Monster", command=deleteMonster)
-btnDeleteMonster.pack(pady=5)
-
-# Monster List Label
-labelListMonsters = Label(frameMonsters, text="Monster List")
-labelListMonsters.pack(pady=5)
-
-# Monster List Frame with Scrollbar
-frameMonsterList = Frame(frameMonsters)
-frameMonsterList.pack(pady=5, fill=BOTH, expand=True)
-
-scrollbarMonsters = Scrollbar(frameMonsterList)
-scrollbarMonsters.pack(side=RIGHT, fill=Y)
-
-listboxMonsters = Listbox(frameMonsterList, yscrollcommand=scrollbarMonsters.set)
-listboxMonsters.pack(pady=5, fill=BOTH, expand=True)
-listboxMonsters.bind('<<ListboxSelect>>', loadMonster)
-
-scrollbarMonsters.config(command=listboxMonsters.yview)
-
-# Search Bars
-# Characters
-labelSearchCharacter = Label(frameCharacters, text="Search Character:")
-labelSearchCharacter.pack(pady=5)
-
-entrySearchCharacter = Entry(frameCharacters)
-entrySearchCharacter.pack(pady=5, fill=X)
-entrySearchCharacter.bind("<KeyRelease>", searchCharacter)
-
-labelListCharacters = Label(frameCharacters, text="Character List")
-labelListCharacters.pack(pady=5)
-
-# Battle Frame
-frameBattle = LabelFrame(main_frame, text="Battle Menu", padx=10, pady=10)
-frameBattle.pack(side=LEFT, fill=BOTH, expand=True, padx=5, pady=5)
-
-# Battle List
-scrollbarBattle = Scrollbar(frameBattle)
-scrollbarBattle.pack(side=RIGHT, fill=Y)
-
-listboxBattle = Listbox(frameBattle, yscrollcommand=scrollbarBattle.set)
-listboxBattle.pack(pady=5, fill=BOTH, expand=True)
-
-scrollbarBattle.config(command=listboxBattle.yview)
-
-# Add to Battle
-btnAddCharToBattle = Button(frameBattle, text="Add Character to Battle", command=addCharacterToBattle)
-btnAddCharToBattle.pack(pady=5)
-
-btnAddMonToBattle = Button(frameBattle, text="Add Monster to Battle", command=addMonsterToBattle)
-btnAddMonToBattle.pack(pady=5)
-
-# clear battle menu
-btnClearBattle = Button(frameBattle, text="Clear Battle List", command=clearBattleList)
-btnClearBattle.pack(pady=5)
-
-# Battle Modifiers
-labelCharModifier = Label(frameBattle, text="Character Modifier:")
-labelCharModifier.pack(pady=5)
-charModifierSpinbox = Spinbox(frameBattle, from_=-100, to=100)
-charModifierSpinbox.pack(pady=5, fill=X)
-charModifierSpinbox.delete(0, "end")
-charModifierSpinbox.insert(0, "0")
-
-labelMonModifier = Label(frameBattle, text="Monster Modifier:")
-labelMonModifier.pack(pady=5)
-monModifierSpinbox = Spinbox(frameBattle, from_=-100, to=100)
-monModifierSpinbox.pack(pady=5, fill=X)
-monModifierSpinbox.delete(0, "end")
-monModifierSpinbox.insert(0, "0")
-
-# Calculate battle
-btnCalculateBattle = Button(frameBattle, text="Calculate Battle", command=calculateBattle)
-btnCalculateBattle.pack(pady=10)
-
-# Monster Search Bar
-labelSearchMonster = Label(frameMonsters, text="Search Monster:")
-labelSearchMonster.pack(pady=5)
-
-entrySearchMonster = Entry(frameMonsters)
-entrySearchMonster.pack(pady=5, fill=X)
-entrySearchMonster.bind("<KeyRelease>", searchMonster)
-
-labelListMonsters = Label(frameMonsters, text="Monster List")
-labelListMonsters.pack(pady=5)
-
-# Equipment Search Bar
-labelSearchArmor = Label(frameArmors, text="Search Equipment:")
-labelSearchArmor.pack(pady=5)
-
-entrySearchArmor = Entry(frameArmors)
-entrySearchArmor.pack(pady=5, fill=X)
-entrySearchArmor.bind("<KeyRelease>", searchArmor)
-
-labelListArmors = Label(frameArmors, text="Equipment List")
-labelListArmors.pack(pady=5)
-
-refreshMonsterList()
-refreshCharacterList()
-refreshArmorList()
-refreshEquipList()
-
-root.mainloop()
-
-conn.close()
+import argparse
+import contextvars
+import logging
+from tkinter import *
+from tkinter import messagebox
+
+from trpgs4 import DuplicateNameError, EntityNotFound, WriteBuffer
+from trpgs4.cache import EntityCache
+from trpgs4.changes import ChangeWatcher, changes_since, latest_change
+from trpgs4.db import DEFAULT_PATH, DEFAULT_PROFILE, PATH_ENV, PROFILE_ENV, PROFILES
+from trpgs4.battle import CHARACTERS_WIN, MONSTERS_WIN
+from trpgs4.encounter import DIFFICULTIES
+from trpgs4.loadout import MAX_ITEMS, OBJECTIVES
+from trpgs4.ranking import NEAR_PERCENT, TOP_N
+from trpgs4.instrument import SLOW_MS, Instrumentation
+from trpgs4.widgets import TkDispatcher, VirtualList
+from trpgs4.worker import DatabaseWorker
+
+# Keystrokes arriving closer together than this collapse into one search
+SEARCH_DELAY_MS = 250
+# Spinbox edits are written once they have been idle this long
+FLUSH_DELAY_MS = 400
+# How often to look for commits made by other instances sharing the file
+WATCH_MS = 1000
+
+BATTLE_MESSAGES = {
+    CHARACTERS_WIN: "Characters Win!",
+    MONSTERS_WIN: "Monsters Win!",
+}
+
+
+class TabletopRPGManager:
+    def __init__(self, root, worker):
+        self.root = root
+        self.db = TkDispatcher(root, worker, on_busy=self.setBusy, on_error=self.showError)
+        self.instrumentation = worker.instrumentation
+        if self.instrumentation is not None:
+            root.bind_all("<F12>", lambda event: self.instrumentation.dump())
+
+        # Pending root.after callbacks, keyed by what they debounce
+        self.pending = {}
+
+        # Spinbox edits waiting to be written, and whether the form is being
+        # filled in from the database rather than by the user
+        self.writes = WriteBuffer()
+        self.populating = False
+
+        # Rows shown in the detail panes, so reselecting one needs no query
+        self.cache = EntityCache()
+
+        # The last change_log entry the lists reflect; writes are followed by
+        # syncLists, which applies only the rows changed since
+        self.change_seq = worker.read(lambda roster: latest_change(roster.conn)).result()
+        self.syncing = False
+        self.sync_again = False
+        self.reload_details = False
+        # (before, after] change_log ranges committed by this instance's writes
+        self.own_changes = []
+        # Commits from other instances only show up through this watcher
+        self.watcher = ChangeWatcher.open(worker.path, worker.profile)
+
+        # Initiate Lists
+        self.selected_characters = []
+        self.selected_armors = []
+        self.selected_battle_characters = []
+        self.selected_battle_monsters = []
+
+        self.buildGui()
+
+        self.refreshMonsterList()
+        self.refreshCharacterList()
+        self.refreshArmorList()
+        self.refreshEquipList()
+        self.root.after(WATCH_MS, self.watchChanges)
+
+    def debounce(self, key, delay, callback):
+        """Run ``callback`` after ``delay`` ms, dropping any earlier call still pending for ``key``."""
+        if key in self.pending:
+            self.root.after_cancel(self.pending[key])
+
+        # The delayed call still counts towards the action that scheduled it
+        context = contextvars.copy_context()
+
+        def run():
+            del self.pending[key]
+            context.run(callback)
+        self.pending[key] = self.root.after(delay, run)
+
+    def action(self, handler):
+        """Wrap a Tk callback so instrumentation counts its queries under its name."""
+        if self.instrumentation is None:
+            return handler
+
+        def run(*args):
+            with self.instrumentation.action(handler.__name__):
+                return handler(*args)
+        return run
+
+    def write(self, fn, then=None, failed=None):
+        """Queue ``fn(roster)`` on the writer, noting the change_log entries it makes as our own."""
+        def run(roster):
+            before = latest_change(roster.conn)
+            result = fn(roster)
+            return result, before, latest_change(roster.conn)
+
+        def done(value):
+            result, before, after = value
+            if after > before:
+                self.own_changes.append((before, after))
+            if then is not None:
+                then(result)
+        self.db.write(run, then=done, failed=failed)
+
+    def ownChange(self, seq):
+        return any(before < seq <= after for before, after in self.own_changes)
+
+    def scheduleFlush(self):
+        self.debounce("flushEdits", FLUSH_DELAY_MS, self.flushEdits)
+
+    def flushEdits(self, then=None):
+        """Write buffered edits in one transaction, then call ``then``.
+
+        The flush is queued on the writer, so ``then`` also runs after any
+        earlier flush that was still in flight.
+        """
+        if "flushEdits" in self.pending:
+            self.root.after_cancel(self.pending.pop("flushEdits"))
+
+        def flushed(edits):
+            if edits:
+                self.syncLists()
+            if any(table != "monsters" for table, row_id in edits):
+                self.updateCharacterBattlePower()
+            if then is not None:
+                then()
+        self.write(self.writes.flush, then=flushed)
+
+    def loadCached(self, table, row_id, read, show):
+        """Show row ``row_id`` of ``table`` from the cache, or read it after pending edits.
+
+        ``read(roster)`` returns the value to cache and ``show(value)`` fills
+        the form; edits invalidate their rows as they are buffered, so a hit
+        is current even while a flush is still pending.
+        """
+        value = self.cache.get(table, row_id)
+        if value is not None:
+            show(value)
+            if len(self.writes):
+                self.flushEdits()
+            return
+
+        version = self.cache.version
+
+        def loaded(value):
+            if value is not None:
+                self.cache.put(table, row_id, value, version)
+                show(value)
+        # Selection changed: write pending edits first so the row reads back current
+        self.flushEdits(then=lambda: self.db.read(read, then=loaded))
+
+    def watchChanges(self):
+        """Sync if anything was committed since the last tick, then check again later."""
+        if self.watcher.changed():
+            self.syncLists(reload_details=True)
+        self.root.after(WATCH_MS, self.watchChanges)
+
+    def syncLists(self, reload_details=False):
+        """Apply the rows changed since the last sync to the lists and the cache.
+
+        With ``reload_details`` a detail pane showing a row that another
+        writer changed is read again; rows whose latest change is this
+        instance's own write leave the forms alone.
+        """
+        self.reload_details = self.reload_details or reload_details
+        if self.syncing:
+            self.sync_again = True
+            return
+        self.syncing = True
+        reload_details, self.reload_details = self.reload_details, False
+
+        def synced(changes):
+            self.syncing = False
+            self.change_seq = changes.seq
+            views = {"characters": self.characterList, "armors": self.armorList,
+                     "monsters": self.monsterList}
+            if changes.reset:
+                self.cache.clear()
+                for view in views.values():
+                    view.reset()
+            loaders = {"characters": self.loadCharacter, "armors": self.loadArmor,
+                       "monsters": self.loadMonster}
+            for table, view in views.items():
+                rows, deleted = changes.rows.get(table, ()), changes.deleted.get(table, ())
+                for row_id in (*(row[0] for row in rows), *deleted):
+                    self.cache.invalidate(table, row_id)
+                view.apply(rows, deleted)
+                selected = view.selected_id()
+                newest = changes.newest.get(table, {})
+                if (reload_details and any(row[0] == selected for row in rows)
+                        and not self.ownChange(newest[selected])):
+                    loaders[table](None)
+            # Later changes all come after changes.seq
+            self.own_changes = [span for span in self.own_changes if span[1] > changes.seq]
+            if self.sync_again:
+                self.sync_again = False
+                self.syncLists()
+
+        def failed(error):
+            self.syncing = False
+            self.showError(error)
+        seq = self.change_seq
+        self.db.read(lambda roster: changes_since(roster.conn, seq), then=synced, failed=failed)
+
+    def onClose(self):
+        self.flushEdits()
+        self.watcher.close()
+        self.root.destroy()
+
+    def setBusy(self, busy):
+        self.labelStatus.config(text="Working..." if busy else "Ready")
+        self.root.config(cursor="watch" if busy else "")
+
+    def showError(self, error):
+        messagebox.showwarning("Database Error", f"{type(error).__name__}: {error}")
+
+    def pageSource(self, table):
+        """A VirtualList page source that reads ``table`` on the worker."""
+        def fetch(after_id, limit, deliver):
+            self.db.read(lambda roster: getattr(roster, table).page(after_id, limit), then=deliver)
+        return fetch
+
+    #Character Functions
+    def addCharacter(self):
+        name = self.entryName.get()
+        description = self.entryDescription.get("1.0", END)
+        level = int(self.levelSpinbox.get())
+
+        if name and description.strip():
+            def added(character_id):
+                messagebox.showinfo("Success", "Character added!")
+
+                # Clear input fields
+                self.entryName.delete(0, END)
+                self.entryDescription.delete("1.0", END)
+                self.levelSpinbox.delete(0, "end")
+                self.levelSpinbox.insert(0, "1")
+
+                self.syncLists()
+
+            def failed(error):
+                if isinstance(error, DuplicateNameError):
+                    messagebox.showwarning("Input Error", f"A character named {name} already exists.")
+                else:
+                    self.showError(error)
+
+            self.write(lambda roster: roster.characters.add(name, description.strip(), level),
+                          then=added, failed=failed)
+        else:
+            messagebox.showwarning("Input Error", "Please provide both name and description.")
+
+    def deleteCharacter(self):
+        character_id = self.characterList.selected_id()
+        if character_id is None:
+            messagebox.showwarning("Delete Error", "Please select a character to delete.")
+            return
+
+        def deleted(_):
+            messagebox.showinfo("Success", "Character deleted!")
+            self.syncLists()
+        self.cache.invalidate("characters", character_id)
+        self.write(lambda roster: roster.characters.delete_by_id(character_id), then=deleted)
+
+    def loadCharacter(self, event):
+        character_id = self.characterList.selected_id()
+        if character_id is None:
+            return
+        self.loadCached("characters", character_id,
+                        lambda roster: roster.characters.detail(character_id), self.showCharacter)
+
+    def showCharacter(self, detail):
+        character, equipped_armors = detail
+        # Ignore answers for a row that is no longer selected
+        if self.characterList.selected_id() != character.id:
+            return
+
+        self.entryName.delete(0, END)
+        self.entryName.insert(END, character.name)
+
+        self.entryDescription.delete("1.0", END)
+        self.entryDescription.insert(END, character.description)
+
+        self.populating = True
+        self.levelSpinbox.delete(0, "end")
+        self.levelSpinbox.insert(0, character.level)
+        self.populating = False
+
+        self.labelBattlePower.config(text=f"Battle Power: {character.battle_power}")
+
+        if equipped_armors:
+            armor_names = [armor[1] for armor in equipped_armors]
+            self.labelEquippedArmor.config(text=f"Equipment: {', '.join(armor_names)}")
+            self.updateEquipList(equipped_armors)
+        else:
+            self.labelEquippedArmor.config(text="Equipment: None")
+            self.updateEquipList([])
+
+    def refreshCharacterList(self):
+        self.characterList.reset()
+
+    def updateCharacterLevel(self, level):
+        try:
+            if self.populating or level.strip() == "":
+                return
+            character_id = self.characterList.selected_id()
+            if character_id is None:
+                return
+            level = int(level)
+        except ValueError:
+            messagebox.showwarning("Update Error", "Please enter a valid integer for character level.")
+            return
+
+        self.writes.set("characters", character_id, level=level)
+        self.cache.invalidate("characters", character_id)
+        self.scheduleFlush()
+
+    def updateCharacterBattlePower(self):
+        character_id = self.characterList.selected_id()
+        if character_id is None:
+            return
+
+        def show(character):
+            if character and self.characterList.selected_id() == character_id:
+                self.labelBattlePower.config(text=f"Battle Power: {character.battle_power}")
+        self.db.read(lambda roster: roster.characters.get_by_id(character_id), then=show,
+                     failed=lambda e: messagebox.showwarning("Error", f"Failed to update battle power: {e}"))
+
+    def searchCharacter(self, event):
+        self.debounce("searchCharacter", SEARCH_DELAY_MS, self.runSearchCharacter)
+
+    def runSearchCharacter(self):
+        query = self.entrySearchCharacter.get()
+        if not query.strip():
+            # Back to browsing; nothing to reload if the list was never filtered
+            if self.characterList.fixed:
+                self.refreshCharacterList()
+            return
+
+        def found(rows):
+            # A newer search has been typed since this one was sent
+            if self.entrySearchCharacter.get() == query:
+                self.characterList.show(rows)
+        self.db.read(lambda roster: roster.characters.search(query), then=found)
+
+    # Armor Functions
+    def addArmor(self):
+        name = self.entryArmorName.get()
+        description = self.entryArmorDescription.get("1.0", END)
+        bonus = int(self.bonusSpinbox.get())
+
+        if name and description.strip():
+            def added(armor_id):
+                messagebox.showinfo("Success", "Equipment added!")
+
+                # Clear input fields
+                self.entryArmorName.delete(0, END)
+                self.entryArmorDescription.delete("1.0", END)
+                self.bonusSpinbox.delete(0, "end")
+                self.bonusSpinbox.insert(0, "0")
+
+                self.syncLists()
+
+            def failed(error):
+                if isinstance(error, DuplicateNameError):
+                    messagebox.showwarning("Input Error", f"Equipment named {name} already exists.")
+                else:
+                    self.showError(error)
+
+            self.write(lambda roster: roster.armors.add(name, description.strip(), bonus),
+                          then=added, failed=failed)
+        else:
+            messagebox.showwarning("Input Error", "Please provide both name and description.")
+
+    def deleteArmor(self):
+        armor_id = self.armorList.selected_id()
+        if armor_id is None:
+            messagebox.showwarning("Delete Error", "Please select an item to delete.")
+            return
+
+        def deleted(_):
+            messagebox.showinfo("Success", "equipment deleted!")
+            self.syncLists()
+        self.cache.invalidate("armors", armor_id)
+        self.write(lambda roster: roster.armors.delete_by_id(armor_id), then=deleted)
+
+    def loadArmor(self, event):
+        armor_id = self.armorList.selected_id()
+        if armor_id is None:
+            return
+        self.loadCached("armors", armor_id,
+                        lambda roster: roster.armors.get_by_id(armor_id), self.showArmor)
+
+    def showArmor(self, armor):
+        if self.armorList.selected_id() != armor.id:
+            return
+
+        self.entryArmorName.delete(0, END)
+        self.entryArmorName.insert(END, armor.name)
+
+        self.entryArmorDescription.delete("1.0", END)
+        self.entryArmorDescription.insert(END, armor.description)
+
+        self.populating = True
+        self.bonusSpinbox.delete(0, "end")
+        self.bonusSpinbox.insert(0, armor.bonus)
+        self.populating = False
+
+    def refreshArmorList(self):
+        self.armorList.reset()
+
+    def updateArmorBonus(self, bonus):
+        try:
+            if self.populating or bonus.strip() == "":
+                return
+
+            armor_id = self.armorList.selected_id()
+            if armor_id is None:
+                return
+            bonus = int(bonus)
+        except ValueError:
+            messagebox.showwarning("Update Error", "Please enter a valid integer for armor bonus.")
+            return
+
+        self.writes.set("armors", armor_id, bonus=bonus)
+        self.cache.invalidate("armors", armor_id)
+        self.scheduleFlush()
+
+    def searchArmor(self, event):
+        self.debounce("searchArmor", SEARCH_DELAY_MS, self.runSearchArmor)
+
+    def runSearchArmor(self):
+        query = self.entrySearchArmor.get()
+        if not query.strip():
+            # Back to browsing; nothing to reload if the list was never filtered
+            if self.armorList.fixed:
+                self.refreshArmorList()
+            return
+
+        def found(rows):
+            if self.entrySearchArmor.get() == query:
+                self.armorList.show(rows)
+        self.db.read(lambda roster: roster.armors.search(query), then=found)
+
+    # Equip Functions
+    def addCharacterToEquip(self):
+        try:
+            selectedCharacter = self.listboxCharacters.get(self.listboxCharacters.curselection())
+            if selectedCharacter not in self.selected_characters:
+                self.selected_characters.append(selectedCharacter)
+                messagebox.showinfo("Success", f"{selectedCharacter} added to equip list!")
+            self.refreshEquipList()
+        except:
+            messagebox.showwarning("Selection Error", "Please select a character to add.")
+
+    def addArmorToEquip(self):
+        try:
+            selectedArmor = self.listboxArmors.get(self.listboxArmors.curselection())
+            if selectedArmor not in self.selected_armors:
+                self.selected_armors.append(selectedArmor)
+                messagebox.showinfo("Success", f"{selectedArmor} added to equip list!")
+            self.refreshEquipList()
+        except:
+            messagebox.showwarning("Selection Error", "Please select equipment to add.")
+
+    # Equip armor
+    def equipAll(self):
+        if not self.selected_characters or not self.selected_armors:
+            messagebox.showwarning("Equip Error", "Please add both characters and equipment to equip.")
+            return
+
+        characters, armors = list(self.selected_characters), list(self.selected_armors)
+
+        def equipped(created):
+            messagebox.showinfo("Success", "All selected characters have equipped all selected equipment!\n"
+                                           f"{created} item(s) equipped.")
+            self.syncLists()
+            self.selected_characters.clear()
+            self.selected_armors.clear()
+            self.refreshEquipList()
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Equip Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        self.cache.invalidate_names("characters", characters)
+        self.write(lambda roster: roster.equipment.equip(characters, armors),
+                      then=equipped, failed=failed)
+
+    def unequipAll(self):
+        if not self.selected_characters or not self.selected_armors:
+            messagebox.showwarning("Unequip Error", "Please add both characters and equipment to unequip.")
+            return
+
+        characters, armors = list(self.selected_characters), list(self.selected_armors)
+
+        def unequipped(removed):
+            messagebox.showinfo("Success", "All selected characters have unequipped all selected equipment!\n"
+                                           f"{removed} item(s) unequipped.")
+            self.syncLists()
+            self.selected_characters.clear()
+            self.selected_armors.clear()
+            self.refreshEquipList()
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Unequip Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        self.cache.invalidate_names("characters", characters)
+        self.write(lambda roster: roster.equipment.unequip(characters, armors),
+                      then=unequipped, failed=failed)
+
+    def optimizeLoadout(self):
+        if not self.selected_characters:
+            messagebox.showwarning("Optimize Error", "Please add characters to optimize.")
+            return
+
+        # With no equipment in the list, the whole armory is the pool
+        characters, armors = list(self.selected_characters), list(self.selected_armors) or None
+        objective = self.objective_var.get()
+        max_items = int(self.maxItemsSpinbox.get())
+        copies = 1 if self.unique_var.get() else None
+
+        def optimized(loadout):
+            lines = "\n".join(f"{name} ({loadout.powers[name]}): {', '.join(armors) or 'nothing'}"
+                               for name, armors in loadout.assignments.items())
+            messagebox.showinfo("Success", f"Equipment reassigned ({objective} power {loadout.value}).\n\n{lines}")
+            self.syncLists()
+            self.selected_characters.clear()
+            self.selected_armors.clear()
+            self.refreshEquipList()
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Optimize Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        self.cache.invalidate_names("characters", characters)
+        self.flushEdits(then=lambda: self.write(
+            lambda roster: roster.loadouts.optimize(characters, armors, objective,
+                                                    max_items=max_items, copies=copies),
+            then=optimized, failed=failed))
+
+    def refreshEquipList(self):
+        self.listboxEquip.delete(0, END)
+        if self.selected_characters:
+            self.listboxEquip.insert(END, "Characters to Equip:")
+            for character in self.selected_characters:
+                self.listboxEquip.insert(END, f" - {character}")
+        if self.selected_armors:
+            self.listboxEquip.insert(END, "Equipment to Equip:")
+            for armor in self.selected_armors:
+                self.listboxEquip.insert(END, f" - {armor}")
+
+    def updateEquipList(self, equipped_armors):
+        self.listboxEquip.delete(0, END)
+        for armor in equipped_armors:
+            self.listboxEquip.insert(END, armor[1])
+
+    def clearEquipList(self):
+        self.selected_characters.clear()
+        self.selected_armors.clear()
+        self.refreshEquipList()
+        messagebox.showinfo("Success", "Equip list cleared!")
+
+    # Monster Functions
+    def addMonster(self):
+        name = self.entryMonsterName.get()
+        description = self.entryMonsterDescription.get("1.0", END)
+        battle_power = int(self.battlePowerSpinbox.get())
+
+        if name and description.strip():
+            def added(monster_id):
+                messagebox.showinfo("Success", "Monster added!")
+
+                self.entryMonsterName.delete(0, END)
+                self.entryMonsterDescription.delete("1.0", END)
+                self.battlePowerSpinbox.delete(0, "end")
+                self.battlePowerSpinbox.insert(0, "1")
+
+                self.syncLists()
+
+            def failed(error):
+                if isinstance(error, DuplicateNameError):
+                    messagebox.showwarning("Input Error", f"A monster named {name} already exists.")
+                else:
+                    self.showError(error)
+
+            self.write(lambda roster: roster.monsters.add(name, description.strip(), battle_power),
+                          then=added, failed=failed)
+        else:
+            messagebox.showwarning("Input Error", "Please provide both name and description.")
+
+    def deleteMonster(self):
+        monster_id = self.monsterList.selected_id()
+        if monster_id is None:
+            messagebox.showwarning("Delete Error", "Please select a monster to delete.")
+            return
+
+        def deleted(_):
+            messagebox.showinfo("Success", "Monster deleted!")
+            self.syncLists()
+        self.cache.invalidate("monsters", monster_id)
+        self.write(lambda roster: roster.monsters.delete_by_id(monster_id), then=deleted)
+
+    def loadMonster(self, event):
+        monster_id = self.monsterList.selected_id()
+        if monster_id is None:
+            return
+        self.loadCached("monsters", monster_id,
+                        lambda roster: roster.monsters.get_by_id(monster_id), self.showMonster)
+
+    def showMonster(self, monster):
+        if self.monsterList.selected_id() != monster.id:
+            return
+
+        self.entryMonsterName.delete(0, END)
+        self.entryMonsterName.insert(END, monster.name)
+
+        self.entryMonsterDescription.delete("1.0", END)
+        self.entryMonsterDescription.insert(END, monster.description)
+
+        self.populating = True
+        self.battlePowerSpinbox.delete(0, "end")
+        self.battlePowerSpinbox.insert(0, monster.battle_power)
+        self.populating = False
+
+    def refreshMonsterList(self):
+        self.monsterList.reset()
+
+    def updateMonsterPower(self, power):
+        try:
+            if self.populating or power.strip() == "":
+                return
+            monster_id = self.monsterList.selected_id()
+            if monster_id is None:
+                return
+            power = int(power)
+        except ValueError:
+            messagebox.showwarning("Update Error", "Please enter a valid integer for monster power.")
+            return
+
+        self.writes.set("monsters", monster_id, battle_power=power)
+        self.cache.invalidate("monsters", monster_id)
+        self.scheduleFlush()
+
+    def searchMonster(self, event):
+        self.debounce("searchMonster", SEARCH_DELAY_MS, self.runSearchMonster)
+
+    def runSearchMonster(self):
+        query = self.entrySearchMonster.get()
+        if not query.strip():
+            # Back to browsing; nothing to reload if the list was never filtered
+            if self.monsterList.fixed:
+                self.refreshMonsterList()
+            return
+
+        def found(rows):
+            if self.entrySearchMonster.get() == query:
+                self.monsterList.show(rows)
+        self.db.read(lambda roster: roster.monsters.search(query), then=found)
+
+    # Battle Menu
+    def addCharacterToBattle(self):
+        try:
+            selectedCharacter = self.listboxCharacters.get(self.listboxCharacters.curselection())
+            if selectedCharacter not in self.selected_battle_characters:
+                self.selected_battle_characters.append(selectedCharacter)
+                messagebox.showinfo("Success", f"{selectedCharacter} added to battle!")
+            self.refreshBattleList()
+        except:
+            messagebox.showwarning("Selection Error", "Please select a character to add.")
+
+    def addMonsterToBattle(self):
+        try:
+            selectedMonster = self.listboxMonsters.get(self.listboxMonsters.curselection())
+            if selectedMonster not in self.selected_battle_monsters:
+                self.selected_battle_monsters.append(selectedMonster)
+                messagebox.showinfo("Success", f"{selectedMonster} added to battle!")
+            self.refreshBattleList()
+        except:
+            messagebox.showwarning("Selection Error", "Please select a monster to add.")
+
+    def refreshBattleList(self):
+        self.listboxBattle.delete(0, END)
+        if self.selected_battle_characters:
+            self.listboxBattle.insert(END, "Characters in Battle:")
+            for character in self.selected_battle_characters:
+                self.listboxBattle.insert(END, f" - {character}")
+        if self.selected_battle_monsters:
+            self.listboxBattle.insert(END, "Monsters in Battle:")
+            for monster in self.selected_battle_monsters:
+                self.listboxBattle.insert(END, f" - {monster}")
+
+    def calculateBattle(self):
+        char_modifier = int(self.charModifierSpinbox.get())
+        monster_modifier = int(self.monModifierSpinbox.get())
+
+        characters, monsters = list(self.selected_battle_characters), list(self.selected_battle_monsters)
+
+        def calculated(battle):
+            result = BATTLE_MESSAGES.get(battle.winner, "It's a Draw!")
+
+            messagebox.showinfo("Battle Result", f"{result}\n"
+                                                 f"Characters: {battle.characters}\n"
+                                                 f"Monsters: {battle.monsters}")
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Battle Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        self.flushEdits(then=lambda: self.db.read(
+            lambda roster: roster.battle.calculate_battle(characters, monsters, char_modifier, monster_modifier),
+            then=calculated, failed=failed))
+
+    def simulateBattle(self):
+        char_modifier = int(self.charModifierSpinbox.get())
+        monster_modifier = int(self.monModifierSpinbox.get())
+
+        characters, monsters = list(self.selected_battle_characters), list(self.selected_battle_monsters)
+
+        def simulated(result):
+            messagebox.showinfo("Simulation Result",
+                                f"{result.battles:,} battles\n"
+                                f"Characters win: {result.win_rate:.1%}\n"
+                                f"Draw: {result.draw_rate:.1%}\n"
+                                f"Monsters win: {result.loss_rate:.1%}\n"
+                                f"Characters: {result.characters.mean:.1f} ± {result.characters.std:.1f}\n"
+                                f"Monsters: {result.monsters.mean:.1f} ± {result.monsters.std:.1f}")
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Battle Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        self.flushEdits(then=lambda: self.db.read(
+            lambda roster: roster.battle.simulate_battle(characters, monsters, char_modifier, monster_modifier),
+            then=simulated, failed=failed))
+
+    def runCombat(self):
+        char_modifier = int(self.charModifierSpinbox.get())
+        monster_modifier = int(self.monModifierSpinbox.get())
+
+        characters, monsters = list(self.selected_battle_characters), list(self.selected_battle_monsters)
+
+        def fought(result):
+            message = BATTLE_MESSAGES.get(result.winner, "It's a Draw!")
+            messagebox.showinfo("Combat Result", f"{message}\n"
+                                                 f"Rounds: {result.rounds}\n"
+                                                 f"Characters standing: {result.characters}\n"
+                                                 f"Monsters standing: {result.monsters}")
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Battle Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        # One query loads the combatants; the fight then runs on the reader thread without the database
+        self.flushEdits(then=lambda: self.db.read(
+            lambda roster: roster.combat.battle(characters, monsters, char_modifier, monster_modifier).resolve(),
+            then=fought, failed=failed))
+
+    def buildEncounter(self):
+        char_modifier = int(self.charModifierSpinbox.get())
+        difficulty = self.difficulty_var.get()
+
+        # Monsters already in the battle stay in every suggested group
+        characters, required = list(self.selected_battle_characters), list(self.selected_battle_monsters)
+        if not characters:
+            messagebox.showwarning("Encounter Error", "Please add characters to the battle first.")
+            return
+
+        def built(encounters):
+            if not encounters:
+                messagebox.showinfo("Encounter Builder", f"No {difficulty} monster group found.")
+                return
+            best = encounters[0]
+            self.selected_battle_monsters[:] = best.monsters
+            self.refreshBattleList()
+            options = "\n".join(f"{encounter.total} ({encounter.margin:+g}): {', '.join(encounter.monsters)}"
+                                 for encounter in encounters)
+            messagebox.showinfo("Encounter Builder", f"Added the first {difficulty} group to the battle.\n\n"
+                                                     f"{options}")
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Encounter Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        self.flushEdits(then=lambda: self.db.read(
+            lambda roster: roster.encounters.build(characters, difficulty, char_modifier, required=required),
+            then=built, failed=failed))
+
+    # Leaderboard
+    def showRanking(self, rows):
+        self.listboxRanking.delete(0, END)
+        for rank, row in enumerate(rows, start=1):
+            self.listboxRanking.insert(END, f"{rank}. {row.name} ({row.battle_power})")
+        if not rows:
+            self.listboxRanking.insert(END, "No matches.")
+
+    def rankTop(self):
+        table = self.rank_table_var.get()
+        try:
+            n = int(self.rankCountSpinbox.get())
+        except ValueError:
+            messagebox.showwarning("Leaderboard Error", "Please enter a valid integer count.")
+            return
+        self.flushEdits(then=lambda: self.db.read(lambda roster: roster.rankings.top(table, n),
+                                                  then=self.showRanking))
+
+    def rankRange(self):
+        table = self.rank_table_var.get()
+        try:
+            low, high = int(self.rankLowSpinbox.get()), int(self.rankHighSpinbox.get())
+        except ValueError:
+            messagebox.showwarning("Leaderboard Error", "Please enter valid integer bounds.")
+            return
+        self.flushEdits(then=lambda: self.db.read(lambda roster: roster.rankings.between(table, low, high),
+                                                  then=self.showRanking))
+
+    def rankNearMonster(self):
+        table = self.rank_table_var.get()
+        try:
+            monster = self.listboxMonsters.get(self.listboxMonsters.curselection())
+            percent = float(self.rankPercentSpinbox.get())
+        except TclError:
+            messagebox.showwarning("Selection Error", "Please select a monster to compare against.")
+            return
+        except ValueError:
+            messagebox.showwarning("Leaderboard Error", "Please enter a valid percentage.")
+            return
+
+        def failed(error):
+            if isinstance(error, EntityNotFound):
+                messagebox.showwarning("Leaderboard Error", f"{error.args[0]} no longer exists.")
+            else:
+                self.showError(error)
+
+        self.flushEdits(then=lambda: self.db.read(
+            lambda roster: roster.rankings.near_entity(table, "monsters", monster, percent),
+            then=self.showRanking, failed=failed))
+
+    def clearBattleList(self):
+        self.selected_battle_characters.clear()
+        self.selected_battle_monsters.clear()
+        self.refreshBattleList()
+        messagebox.showinfo("Success", "Battle list cleared!")
+
+    # GUI
+    def buildGui(self):
+        root = self.root
+        root.title("Tabletop RPG Manager")
+        root.geometry("1200x1000")
+
+        # Status Bar
+        self.labelStatus = Label(root, text="Ready", anchor=W, relief=SUNKEN)
+        self.labelStatus.pack(side=BOTTOM, fill=X)
+
+        root.protocol("WM_DELETE_WINDOW", self.onClose)
+
+        # Canvas and Scrollbar
+        canvas = Canvas(root)
+        canvas.pack(side=LEFT, fill=BOTH, expand=True)
+
+        scrollbar = Scrollbar(root, orient=VERTICAL, command=canvas.yview)
+        scrollbar.pack(side=RIGHT, fill=Y)
+
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+
+        main_frame = Frame(canvas)
+        canvas.create_window((0, 0), window=main_frame, anchor="nw")
+
+        # Character Frame
+        frameCharacters = LabelFrame(main_frame, text="Characters", padx=10, pady=10)
+        frameCharacters.pack(side=LEFT, fill=BOTH, expand=True)
+
+        labelName = Label(frameCharacters, text="Character Name:")
+        labelName.pack(pady=5)
+        self.entryName = Entry(frameCharacters)
+        self.entryName.pack(pady=5, fill=X)
+
+        # character description
+        labelDescription = Label(frameCharacters, text="Character Description:")
+        labelDescription.pack(pady=5)
+        self.entryDescription = Text(frameCharacters, height=5, width=30)
+        self.entryDescription.pack(pady=5, fill=X)
+
+        # Character Level and battle power update
+        self.level_var = StringVar(value="0")
+        labelLevel = Label(frameCharacters, text="Character Level:")
+        labelLevel.pack(pady=5)
+        self.levelSpinbox = Spinbox(
+            frameCharacters, from_=-100, to=10000, textvariable=self.level_var
+        )
+        self.levelSpinbox.pack(pady=5, fill=X)
+        self.level_var.trace("w", lambda *args: self.updateCharacterLevel(self.level_var.get()))
+
+        # Add and Delete Character buttons
+        btnAddCharacter = Button(frameCharacters, text="Add Character", command=self.action(self.addCharacter))
+        btnAddCharacter.pack(pady=10)
+
+        btnDeleteCharacter = Button(frameCharacters, text="Delete Character", command=self.action(self.deleteCharacter))
+        btnDeleteCharacter.pack(pady=5)
+
+        labelListCharacters = Label(frameCharacters, text="Character List")
+        labelListCharacters.pack(pady=5)
+
+        # Character List Frame
+        frameCharacterList = Frame(frameCharacters)
+        frameCharacterList.pack(pady=5, fill=BOTH, expand=True)
+
+        # Character Scrollbar
+        scrollbarCharacters = Scrollbar(frameCharacterList)
+        scrollbarCharacters.pack(side=RIGHT, fill=Y)
+
+        self.listboxCharacters = Listbox(frameCharacterList, yscrollcommand=scrollbarCharacters.set)
+        self.listboxCharacters.pack(pady=5, fill=BOTH, expand=True)
+        self.listboxCharacters.bind('<<ListboxSelect>>', self.action(self.loadCharacter))
+
+        scrollbarCharacters.config(command=self.listboxCharacters.yview)
+        self.characterList = VirtualList(self.listboxCharacters, scrollbarCharacters, self.pageSource("characters"))
+
+        # Add character to Equip menu
+        btnAddCharacterToEquip = Button(frameCharacters, text="Add to Equip", command=self.action(self.addCharacterToEquip))
+        btnAddCharacterToEquip.pack(pady=5)
+
+        # Equipped Items
+        self.labelEquippedArmor = Label(frameCharacters, text="Equipped items: None")
+        self.labelEquippedArmor.pack(pady=5)
+
+        # Battle Power
+        self.labelBattlePower = Label(frameCharacters, text="Battle Power: 0")
+        self.labelBattlePower.pack(pady=5)
+
+        # Equipment Frame
+        frameArmors = LabelFrame(main_frame, text="Equipment", padx=10, pady=10)
+        frameArmors.pack(side=LEFT, fill=BOTH, expand=True)
+
+        labelArmorName = Label(frameArmors, text="Equipment Name:")
+        labelArmorName.pack(pady=5)
+        self.entryArmorName = Entry(frameArmors)
+        self.entryArmorName.pack(pady=5, fill=X)
+
+        # Equipment Description
+        labelArmorDescription = Label(frameArmors, text="Equipment Description:")
+        labelArmorDescription.pack(pady=5)
+        self.entryArmorDescription = Text(frameArmors, height=5, width=30)
+        self.entryArmorDescription.pack(pady=5, fill=X)
+
+        # Equipment Bonus and real time battle power update
+        self.armor_bonus_var = StringVar(value="0")
+        labelArmorBonus = Label(frameArmors, text="Equipment Bonus:")
+        labelArmorBonus.pack(pady=5)
+        self.bonusSpinbox = Spinbox(
+            frameArmors, from_=-10000, to=10000, textvariable=self.armor_bonus_var
+        )
+        self.bonusSpinbox.pack(pady=5, fill=X)
+
+        self.armor_bonus_var.trace("w", lambda *args: self.updateArmorBonus(self.armor_bonus_var.get()))
+
+        # Add and Delete Armor buttons
+        btnAddArmor = Button(frameArmors, text="Add Equipment", command=self.action(self.addArmor))
+        btnAddArmor.pack(pady=10)
+
+        btnDeleteArmor = Button(frameArmors, text="Delete Equipment", command=self.action(self.deleteArmor))
+        btnDeleteArmor.pack(pady=5)
+
+        labelListArmors = Label(frameArmors, text="Equipment List")
+        labelListArmors.pack(pady=5)
+
+        # Equipment List Frame
+        frameArmorList = Frame(frameArmors)
+        frameArmorList.pack(pady=5, fill=BOTH, expand=True)
+
+        # SEquipment Scrollbar
+        scrollbarArmors = Scrollbar(frameArmorList)
+        scrollbarArmors.pack(side=RIGHT, fill=Y)
+
+        self.listboxArmors = Listbox(frameArmorList, yscrollcommand=scrollbarArmors.set)
+        self.listboxArmors.pack(pady=5, fill=BOTH, expand=True)
+
+        scrollbarArmors.config(command=self.listboxArmors.yview)
+        self.armorList = VirtualList(self.listboxArmors, scrollbarArmors, self.pageSource("armors"))
+
+        self.listboxArmors.bind('<<ListboxSelect>>', self.action(self.loadArmor))
+
+        # Add Equipment to Equip Menu
+        btnAddArmorToEquip = Button(frameArmors, text="Add to Equip", command=self.action(self.addArmorToEquip))
+        btnAddArmorToEquip.pack(pady=5)
+
+        # Equip List Frame
+        frameEquipList = LabelFrame(main_frame, text="Equip List", padx=10, pady=10)
+        frameEquipList.pack(side=LEFT, fill=BOTH, expand=True, padx=5, pady=5)
+
+        frameEquipButtons = Frame(frameEquipList)
+        frameEquipButtons.grid(row=0, column=0, columnspan=2, pady=(0, 5))
+
+        # Equip All Button
+        btnEquipAll = Button(frameEquipButtons, text="Equip All", command=self.action(self.equipAll))
+        btnEquipAll.grid(row=0, column=0, padx=5)
+
+        # Unequip All Button
+        btnUnequipAll = Button(frameEquipButtons, text="Unequip All", command=self.action(self.unequipAll))
+        btnUnequipAll.grid(row=0, column=1, padx=5)
+
+        # Loadout optimizer
+        labelMaxItems = Label(frameEquipButtons, text="Max Items:")
+        labelMaxItems.grid(row=1, column=0, padx=5, pady=(5, 0))
+        self.maxItemsSpinbox = Spinbox(frameEquipButtons, from_=1, to=100, width=5)
+        self.maxItemsSpinbox.grid(row=1, column=1, padx=5, pady=(5, 0))
+        self.maxItemsSpinbox.delete(0, "end")
+        self.maxItemsSpinbox.insert(0, str(MAX_ITEMS))
+
+        self.objective_var = StringVar(value="total")
+        optionObjective = OptionMenu(frameEquipButtons, self.objective_var, *OBJECTIVES)
+        optionObjective.grid(row=2, column=0, padx=5)
+        self.unique_var = BooleanVar(value=False)
+        checkUnique = Checkbutton(frameEquipButtons, text="Unique Items", variable=self.unique_var)
+        checkUnique.grid(row=2, column=1, padx=5)
+
+        btnOptimize = Button(frameEquipButtons, text="Optimize Loadout", command=self.action(self.optimizeLoadout))
+        btnOptimize.grid(row=3, column=0, columnspan=2, pady=(5, 0))
+
+        self.listboxEquip = Listbox(frameEquipList)
+        self.listboxEquip.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+
+        scrollbarEquip = Scrollbar(frameEquipList, orient=VERTICAL, command=self.listboxEquip.yview)
+        scrollbarEquip.grid(row=1, column=1, sticky="ns", pady=5)
+
+        self.listboxEquip.config(yscrollcommand=scrollbarEquip.set)
+
+        frameEquipList.grid_rowconfigure(1, weight=1)
+        frameEquipList.grid_columnconfigure(0, weight=1)
+
+        # Clear Equip List Button
+        btnClearEquip = Button(frameEquipList, text="Clear Equip List", command=self.action(self.clearEquipList))
+        btnClearEquip.grid(row=2, column=0, columnspan=2, pady=(5, 0))
+
+        # Monster Frame
+        frameMonsters = LabelFrame(main_frame, text="Monsters", padx=10, pady=10)
+        frameMonsters.pack(side=LEFT, fill=BOTH, expand=True, padx=5, pady=5)
+
+        # Monster Name Input
+        labelMonsterName = Label(frameMonsters, text="Monster Name:")
+        labelMonsterName.pack(pady=5)
+        self.entryMonsterName = Entry(frameMonsters)
+        self.entryMonsterName.pack(pady=5, fill=X)
+
+        # Monster Description Input
+        labelMonsterDescription = Label(frameMonsters, text="Monster Description:")
+        labelMonsterDescription.pack(pady=5)
+        self.entryMonsterDescription = Text(frameMonsters, height=5, width=30)
+        self.entryMonsterDescription.pack(pady=5, fill=X)
+
+        # Monster Battle Power Input
+        self.monster_power_var = StringVar(value=0)
+        labelMonsterPower = Label(frameMonsters, text="Monster Battle Power:")
+        labelMonsterPower.pack(pady=5)
+        self.battlePowerSpinbox = Spinbox(frameMonsters, from_=0, to=10000, textvariable=self.monster_power_var)
+        self.battlePowerSpinbox.pack(pady=5, fill=X)
+        self.monster_power_var.trace("w", lambda *args: self.updateMonsterPower(self.monster_power_var.get()))
+
+        # Add and Delete Monster Buttons
+        btnAddMonster = Button(frameMonsters, text="Add Monster", command=self.action(self.addMonster))
+        btnAddMonster.pack(pady=10)
+
+        btnDeleteMonster = Button(frameMonsters, text="Delete Monster", command=self.action(self.deleteMonster))
+        btnDeleteMonster.pack(pady=5)
+
+        # Monster List Label
+        labelListMonsters = Label(frameMonsters, text="Monster List")
+        labelListMonsters.pack(pady=5)
+
+        # Monster List Frame with Scrollbar
+        frameMonsterList = Frame(frameMonsters)
+        frameMonsterList.pack(pady=5, fill=BOTH, expand=True)
+
+        scrollbarMonsters = Scrollbar(frameMonsterList)
+        scrollbarMonsters.pack(side=RIGHT, fill=Y)
+
+        self.listboxMonsters = Listbox(frameMonsterList, yscrollcommand=scrollbarMonsters.set)
+        self.listboxMonsters.pack(pady=5, fill=BOTH, expand=True)
+        self.listboxMonsters.bind('<<ListboxSelect>>', self.action(self.loadMonster))
+
+        scrollbarMonsters.config(command=self.listboxMonsters.yview)
+        self.monsterList = VirtualList(self.listboxMonsters, scrollbarMonsters, self.pageSource("monsters"))
+
+        # Search Bars
+        # Characters
+        labelSearchCharacter = Label(frameCharacters, text="Search Character:")
+        labelSearchCharacter.pack(pady=5)
+
+        self.entrySearchCharacter = Entry(frameCharacters)
+        self.entrySearchCharacter.pack(pady=5, fill=X)
+        self.entrySearchCharacter.bind("<KeyRelease>", self.action(self.searchCharacter))
+
+        labelListCharacters = Label(frameCharacters, text="Character List")
+        labelListCharacters.pack(pady=5)
+
+        # Battle Frame
+        frameBattle = LabelFrame(main_frame, text="Battle Menu", padx=10, pady=10)
+        frameBattle.pack(side=LEFT, fill=BOTH, expand=True, padx=5, pady=5)
+
+        # Battle List
+        scrollbarBattle = Scrollbar(frameBattle)
+        scrollbarBattle.pack(side=RIGHT, fill=Y)
+
+        self.listboxBattle = Listbox(frameBattle, yscrollcommand=scrollbarBattle.set)
+        self.listboxBattle.pack(pady=5, fill=BOTH, expand=True)
+
+        scrollbarBattle.config(command=self.listboxBattle.yview)
+
+        # Add to Battle
+        btnAddCharToBattle = Button(frameBattle, text="Add Character to Battle", command=self.action(self.addCharacterToBattle))
+        btnAddCharToBattle.pack(pady=5)
+
+        btnAddMonToBattle = Button(frameBattle, text="Add Monster to Battle", command=self.action(self.addMonsterToBattle))
+        btnAddMonToBattle.pack(pady=5)
+
+        # clear battle menu
+        btnClearBattle = Button(frameBattle, text="Clear Battle List", command=self.action(self.clearBattleList))
+        btnClearBattle.pack(pady=5)
+
+        # Battle Modifiers
+        labelCharModifier = Label(frameBattle, text="Character Modifier:")
+        labelCharModifier.pack(pady=5)
+        self.charModifierSpinbox = Spinbox(frameBattle, from_=-100, to=100)
+        self.charModifierSpinbox.pack(pady=5, fill=X)
+        self.charModifierSpinbox.delete(0, "end")
+        self.charModifierSpinbox.insert(0, "0")
+
+        labelMonModifier = Label(frameBattle, text="Monster Modifier:")
+        labelMonModifier.pack(pady=5)
+        self.monModifierSpinbox = Spinbox(frameBattle, from_=-100, to=100)
+        self.monModifierSpinbox.pack(pady=5, fill=X)
+        self.monModifierSpinbox.delete(0, "end")
+        self.monModifierSpinbox.insert(0, "0")
+
+        # Calculate battle
+        btnCalculateBattle = Button(frameBattle, text="Calculate Battle", command=self.action(self.calculateBattle))
+        btnCalculateBattle.pack(pady=10)
+
+        btnSimulateBattle = Button(frameBattle, text="Simulate Battle", command=self.action(self.simulateBattle))
+        btnSimulateBattle.pack(pady=(0, 10))
+
+        btnRunCombat = Button(frameBattle, text="Run Combat", command=self.action(self.runCombat))
+        btnRunCombat.pack(pady=(0, 10))
+
+        # Encounter builder
+        labelDifficulty = Label(frameBattle, text="Encounter Difficulty:")
+        labelDifficulty.pack(pady=5)
+        self.difficulty_var = StringVar(value="medium")
+        optionDifficulty = OptionMenu(frameBattle, self.difficulty_var, *DIFFICULTIES)
+        optionDifficulty.pack(pady=5, fill=X)
+        btnBuildEncounter = Button(frameBattle, text="Build Encounter", command=self.action(self.buildEncounter))
+        btnBuildEncounter.pack(pady=(0, 10))
+
+        # Leaderboard Frame
+        frameRanking = LabelFrame(main_frame, text="Leaderboard", padx=10, pady=10)
+        frameRanking.pack(side=LEFT, fill=BOTH, expand=True, padx=5, pady=5)
+
+        self.rank_table_var = StringVar(value="characters")
+        optionRankTable = OptionMenu(frameRanking, self.rank_table_var, "characters", "monsters")
+        optionRankTable.pack(pady=5, fill=X)
+
+        labelRankCount = Label(frameRanking, text="How Many:")
+        labelRankCount.pack(pady=5)
+        self.rankCountSpinbox = Spinbox(frameRanking, from_=1, to=1000)
+        self.rankCountSpinbox.pack(pady=5, fill=X)
+        self.rankCountSpinbox.delete(0, "end")
+        self.rankCountSpinbox.insert(0, str(TOP_N))
+        btnRankTop = Button(frameRanking, text="Show Strongest", command=self.action(self.rankTop))
+        btnRankTop.pack(pady=(0, 10))
+
+        labelRankRange = Label(frameRanking, text="Battle Power From / To:")
+        labelRankRange.pack(pady=5)
+        self.rankLowSpinbox = Spinbox(frameRanking, from_=-100000, to=100000)
+        self.rankLowSpinbox.pack(pady=5, fill=X)
+        self.rankLowSpinbox.delete(0, "end")
+        self.rankLowSpinbox.insert(0, "40")
+        self.rankHighSpinbox = Spinbox(frameRanking, from_=-100000, to=100000)
+        self.rankHighSpinbox.pack(pady=5, fill=X)
+        self.rankHighSpinbox.delete(0, "end")
+        self.rankHighSpinbox.insert(0, "60")
+        btnRankRange = Button(frameRanking, text="Show In Range", command=self.action(self.rankRange))
+        btnRankRange.pack(pady=(0, 10))
+
+        labelRankPercent = Label(frameRanking, text="Within ± % of Selected Monster:")
+        labelRankPercent.pack(pady=5)
+        self.rankPercentSpinbox = Spinbox(frameRanking, from_=0, to=100)
+        self.rankPercentSpinbox.pack(pady=5, fill=X)
+        self.rankPercentSpinbox.delete(0, "end")
+        self.rankPercentSpinbox.insert(0, str(NEAR_PERCENT))
+        btnRankNear = Button(frameRanking, text="Show Near Monster", command=self.action(self.rankNearMonster))
+        btnRankNear.pack(pady=(0, 10))
+
+        scrollbarRanking = Scrollbar(frameRanking)
+        scrollbarRanking.pack(side=RIGHT, fill=Y)
+        self.listboxRanking = Listbox(frameRanking, yscrollcommand=scrollbarRanking.set)
+        self.listboxRanking.pack(pady=5, fill=BOTH, expand=True)
+        scrollbarRanking.config(command=self.listboxRanking.yview)
+
+        # Monster Search Bar
+        labelSearchMonster = Label(frameMonsters, text="Search Monster:")
+        labelSearchMonster.pack(pady=5)
+
+        self.entrySearchMonster = Entry(frameMonsters)
+        self.entrySearchMonster.pack(pady=5, fill=X)
+        self.entrySearchMonster.bind("<KeyRelease>", self.action(self.searchMonster))
+
+        labelListMonsters = Label(frameMonsters, text="Monster List")
+        labelListMonsters.pack(pady=5)
+
+        # Equipment Search Bar
+        labelSearchArmor = Label(frameArmors, text="Search Equipment:")
+        labelSearchArmor.pack(pady=5)
+
+        self.entrySearchArmor = Entry(frameArmors)
+        self.entrySearchArmor.pack(pady=5, fill=X)
+        self.entrySearchArmor.bind("<KeyRelease>", self.action(self.searchArmor))
+
+        labelListArmors = Label(frameArmors, text="Equipment List")
+        labelListArmors.pack(pady=5)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tabletop RPG Manager")
+    parser.add_argument("--db", help=f"database file (default: ${PATH_ENV} or {DEFAULT_PATH})")
+    parser.add_argument("--profile", choices=sorted(PROFILES),
+                        help=f"connection profile (default: ${PROFILE_ENV} or {DEFAULT_PROFILE})")
+    parser.add_argument("--trace", action="store_true",
+                        help="collect query statistics; F12 or exit prints them to stderr")
+    parser.add_argument("--slow-ms", type=float, default=SLOW_MS,
+                        help=f"with --trace, log statements slower than this (default: {SLOW_MS:g})")
+    args = parser.parse_args(argv)
+
+    instrumentation = None
+    if args.trace:
+        logging.basicConfig(format="%(name)s: %(message)s")
+        instrumentation = Instrumentation(args.slow_ms)
+        instrumentation.dump_at_exit()
+    worker = DatabaseWorker(args.db, args.profile, instrumentation=instrumentation)
+    root = Tk()
+    app = TabletopRPGManager(root, worker)
+    root.mainloop()
+    # Anything still buffered if the loop ended without onClose
+    if app.writes:
+        worker.write(app.writes.flush).result()
+    worker.close()
+
+
+if __name__ == "__main__":
+    main()
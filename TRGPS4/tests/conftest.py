@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from trpgs4.db import connect
+from trpgs4.roster import Roster
+from trpgs4.schema import MIGRATIONS, TABLES
+
+# A database as the original program left it: no schema version, repeated
+# names, repeated equip links and links to rows that were deleted later.
+BASELINE_CHARACTERS = (('A', 'original', 1), ('A', 'second', 2), ('A #2', 'named by the user', 3),
+                       ('Borin', 'dwarf', 4), ('Cela', 'cleric', 5), ('Gone', 'deleted', 1))
+BASELINE_ARMORS = (('Helm', 'iron', 2), ('Helm', 'bronze', 1), ('Mail', 'chain', 5),
+                   ('Ring', 'gold', 3), ('Cloak', 'wool', 1))
+BASELINE_LINKS = ((1, 1), (1, 1), (1, 3), (2, 3), (4, 3), (4, 4), (4, 5), (5, 5), (5, 4), (6, 1),
+                  (1, 9))
+
+
+def build_baseline(path):
+    conn = sqlite3.connect(path)
+    with conn:
+        for statement in TABLES:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO characters (name, description, level) VALUES (?, ?, ?)",
+                         BASELINE_CHARACTERS)
+        conn.executemany("INSERT INTO armors (name, description, bonus) VALUES (?, ?, ?)",
+                         BASELINE_ARMORS)
+        conn.executemany("INSERT INTO character_armor (character_id, armor_id) VALUES (?, ?)",
+                         BASELINE_LINKS)
+        # Nothing enforced foreign keys, so their links stay behind
+        conn.execute("DELETE FROM characters WHERE name='Gone'")
+        conn.execute("DELETE FROM armors WHERE name='Cloak'")
+    conn.close()
+
+
+def upgrade_to(conn, version):
+    """Run migrations one at a time, like ``migrate`` does, up to ``version``."""
+    start = conn.execute("PRAGMA user_version").fetchone()[0]
+    for step in range(start, version):
+        conn.execute("BEGIN")
+        MIGRATIONS[step](conn)
+        conn.execute(f"PRAGMA user_version = {step + 1}")
+        conn.commit()
+
+
+def stale_battle_power(conn):
+    """Names of characters whose battle_power is not level plus their equipped bonuses."""
+    return [row[0] for row in conn.execute(
+        '''SELECT name FROM characters
+           WHERE battle_power IS NOT level + COALESCE(
+               (SELECT SUM(armors.bonus) FROM character_armor
+                JOIN armors ON armors.id = character_armor.armor_id
+                WHERE character_armor.character_id = characters.id), 0)''')]
+
+
+@pytest.fixture
+def baseline_path(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    build_baseline(path)
+    return path
+
+
+@pytest.fixture
+def roster(tmp_path):
+    roster = Roster(connect(str(tmp_path / 'roster.db')))
+    yield roster
+    roster.close()
@@ -0,0 +1,153 @@
+import logging
+import sqlite3
+
+import pytest
+
+from trpgs4.changes import changes_since, latest_change
+from trpgs4.db import connect
+from trpgs4.roster import Roster
+from trpgs4.schema import SCHEMA_VERSION, fts_available, schema_version
+
+from .conftest import stale_battle_power, upgrade_to
+
+needs_fts = pytest.mark.skipif(not fts_available(sqlite3.connect(':memory:')),
+                               reason="SQLite built without FTS5")
+
+
+def names(conn, table):
+    return [row[0] for row in conn.execute(f"SELECT name FROM {table} ORDER BY id")]
+
+
+def test_upgrade_from_baseline(baseline_path):
+    conn = connect(baseline_path)
+    assert schema_version(conn) == SCHEMA_VERSION
+    assert names(conn, 'characters') == ['A', 'A #2.2', 'A #2', 'Borin', 'Cela']
+    assert names(conn, 'armors') == ['Helm', 'Helm #2', 'Mail', 'Ring']
+    assert conn.execute('''SELECT COUNT(*) FROM character_armor
+                           WHERE character_id NOT IN (SELECT id FROM characters)
+                              OR armor_id NOT IN (SELECT id FROM armors)''').fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM character_armor").fetchone()[0] == 6
+    assert stale_battle_power(conn) == []
+    assert conn.execute("SELECT battle_power FROM characters WHERE name='A'").fetchone()[0] == 1 + 2 + 5
+
+
+def test_migrate_is_idempotent(baseline_path):
+    conn = connect(baseline_path)
+    conn.close()
+    conn = connect(baseline_path)
+    assert schema_version(conn) == SCHEMA_VERSION
+    assert names(conn, 'characters') == ['A', 'A #2.2', 'A #2', 'Borin', 'Cela']
+
+
+def test_rename_duplicates_keeps_oldest_and_free_names(baseline_path, caplog):
+    conn = sqlite3.connect(baseline_path)
+    upgrade_to(conn, 1)
+    with caplog.at_level(logging.WARNING, logger='trpgs4.schema'):
+        upgrade_to(conn, 2)
+    # The user's own "A #2" keeps its name; the duplicate gets one nobody has
+    assert names(conn, 'characters') == ['A', 'A #2.2', 'A #2', 'Borin', 'Cela']
+    assert "'A' (id 2) to 'A #2.2'" in caplog.text
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO characters (name, description) VALUES ('Borin', 'again')")
+
+
+def test_materialized_battle_power(baseline_path):
+    conn = sqlite3.connect(baseline_path)
+    upgrade_to(conn, 3)
+    # Duplicate and orphaned links still count until version 5 compacts them
+    powers = dict(conn.execute("SELECT name, battle_power FROM characters"))
+    assert powers['A'] == 1 + 2 + 2 + 5
+    assert stale_battle_power(conn) == []
+
+
+@needs_fts
+def test_search_index_built_from_existing_rows(baseline_path):
+    conn = sqlite3.connect(baseline_path)
+    upgrade_to(conn, 4)
+    assert [row[0] for row in conn.execute(
+        "SELECT rowid FROM characters_fts WHERE characters_fts MATCH 'dwarf'")] == [4]
+    conn.execute("INSERT INTO characters_fts(characters_fts) VALUES ('integrity-check')")
+
+
+def test_link_integrity(baseline_path, caplog):
+    conn = sqlite3.connect(baseline_path)
+    upgrade_to(conn, 4)
+    with caplog.at_level(logging.WARNING, logger='trpgs4.schema'):
+        upgrade_to(conn, 5)
+    assert "removed 4 orphaned and 1 duplicate equipment links; 6 remain" in caplog.text
+    assert stale_battle_power(conn) == []
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO character_armor VALUES (1, 1)")
+
+
+def test_battle_power_follows_every_write(roster):
+    roster.characters.add('Aria', 'ranger', 3)
+    roster.characters.add('Borin', 'dwarf', 2)
+    roster.armors.add('Helm', 'iron', 2)
+    roster.armors.add('Mail', 'chain', 5)
+
+    def power(name):
+        return roster.characters.get(name).battle_power
+
+    roster.equipment.equip(['Aria', 'Borin'], ['Helm', 'Mail'])
+    assert (power('Aria'), power('Borin')) == (10, 9)
+    roster.equipment.unequip(['Borin'], ['Mail'])
+    assert power('Borin') == 4
+    roster.armors.set_bonus('Helm', 4)
+    assert (power('Aria'), power('Borin')) == (12, 6)
+    roster.characters.set_level('Aria', 5)
+    assert power('Aria') == 14
+    roster.armors.delete('Helm')
+    assert (power('Aria'), power('Borin')) == (10, 2)
+    assert stale_battle_power(roster.conn) == []
+
+
+def test_deletes_cascade_to_links(roster):
+    roster.characters.add('Aria', 'ranger', 3)
+    roster.armors.add('Helm', 'iron', 2)
+    roster.armors.add('Mail', 'chain', 5)
+    roster.equipment.equip(['Aria'], ['Helm', 'Mail'])
+
+    roster.armors.delete('Helm')
+    assert roster.characters.equipment('Aria') == [('Mail', 5)]
+    roster.characters.delete('Aria')
+    assert roster.conn.execute("SELECT COUNT(*) FROM character_armor").fetchone()[0] == 0
+
+
+@needs_fts
+def test_search_index_follows_writes(roster):
+    roster.characters.add('Aria', 'elven ranger', 3)
+    roster.characters.add('Borin', 'dwarf who met Aria', 2)
+    assert [name for row_id, name in roster.characters.search('ari')] == ['Aria', 'Borin']
+
+    aria = roster.characters.get('Aria')
+    roster.characters.update_by_id(aria.id, name='Arwen')
+    assert [name for row_id, name in roster.characters.search('arw')] == ['Arwen']
+    roster.characters.delete('Borin')
+    assert roster.characters.search('ari') == []
+    assert roster.characters.search('!!!') == []
+    roster.conn.execute("INSERT INTO characters_fts(characters_fts) VALUES ('integrity-check')")
+
+
+def test_change_log_skips_updates_that_change_nothing(roster):
+    roster.characters.add('Aria', 'ranger', 3)
+    roster.armors.add('Cloth', 'plain', 0)
+    seq = latest_change(roster.conn)
+
+    aria = roster.characters.get('Aria')
+    roster.characters.update_by_id(aria.id, level=3)
+    roster.equipment.equip(['Aria'], ['Cloth'])
+    assert latest_change(roster.conn) == seq
+
+    roster.characters.update_by_id(aria.id, description='elven ranger')
+    changes = changes_since(roster.conn, seq)
+    assert changes.rows == {'characters': [(aria.id, 'Aria')]}
+
+
+def test_newer_schema_is_refused(tmp_path):
+    path = str(tmp_path / 'future.db')
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(RuntimeError):
+        Roster.open(path)
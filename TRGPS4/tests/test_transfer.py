@@ -0,0 +1,56 @@
+import io
+import json
+
+import pytest
+
+from trpgs4 import cli
+from trpgs4.transfer import TransferError, entity_row, import_records, read_records
+
+
+def test_entity_row_defaults_and_converts():
+    assert entity_row('characters', 1, {'name': ' Aria ', 'description': 'ranger'}) == ('Aria', 'ranger', 1)
+    assert entity_row('armors', 1, {'name': 'Helm', 'description': 'iron', 'bonus': '2'}) == \
+        ('Helm', 'iron', 2)
+    assert entity_row('monsters', 1, {'name': 'Ogre', 'description': 'big', 'battle_power': 7.0}) == \
+        ('Ogre', 'big', 7)
+
+
+@pytest.mark.parametrize('record, message', [
+    ({'name': 'A', 'description': 'd', 'level': 2.9}, "level must be an integer"),
+    ({'name': 'A', 'description': 'd', 'level': True}, "level must be an integer"),
+    ({'name': 'A', 'description': 'd', 'level': 'two'}, "level must be an integer"),
+    ({'name': 7, 'description': 'd'}, "name must be text"),
+    ({'name': 'A', 'description': True}, "description must be text"),
+    ({'name': '  ', 'description': 'd'}, "name is required"),
+])
+def test_entity_row_rejects(record, message):
+    with pytest.raises(TransferError, match=message):
+        entity_row('characters', 3, record)
+
+
+@pytest.mark.parametrize('text, message', [
+    ('{"name": "A"}\n{bad\n', "record 2: invalid JSON"),
+    ('{"name": "A"}\n\n[1]\n', "record 2: record must be an object"),
+])
+def test_read_records_names_bad_lines(text, message):
+    with pytest.raises(TransferError, match=message):
+        list(read_records(io.StringIO(text), 'jsonl'))
+
+
+def test_dry_run_reports_taken_and_repeated_names(roster):
+    roster.characters.add('Aria', 'ranger', 3)
+    records = [{'name': 'Borin', 'description': 'dwarf'}, {'name': 'Aria', 'description': 'again'},
+               {'name': 'Borin', 'description': 'again'}]
+    stats = import_records(roster.conn, 'characters', records, batch_size=2, dry_run=True)
+    assert stats.rows == 1
+    assert [str(error) for error in stats.errors] == [
+        "record 2: 'Aria' already exists", "record 3: 'Borin' appears earlier in the file"]
+    assert roster.characters.names() == ['Aria']
+
+
+@pytest.mark.parametrize('text', ['[1, 2]\n', '{bad\n'])
+def test_cli_reports_bad_records(tmp_path, monkeypatch, capsys, text):
+    monkeypatch.setattr('sys.stdin', io.StringIO(text))
+    assert cli.main(['--db', str(tmp_path / 'cli.db'), 'batch', '-']) == 1
+    error = json.loads(capsys.readouterr().err)
+    assert error['record'] == 1
@@ -0,0 +1,13 @@
+"""Headless data layer for the Tabletop RPG Manager.
+
+Importing this package neither opens a database nor loads Tk; call
+``Roster.open(path)`` (or wrap an existing connection with ``Roster(conn)``)
+to get at the data.
+"""
+from .battle import BattleResult, BattleService
+from .db import DEFAULT_PATH, PROFILES, connect
+from .repository import (Armor, ArmorRepository, Character, CharacterRepository,
+                         DuplicateNameError, EntityNotFound, EquipmentRepository, Monster,
+                         MonsterRepository)
+from .roster import Roster
+from .writebehind import WriteBuffer
@@ -0,0 +1,93 @@
+"""Battle power and battle resolution."""
+import json
+from collections import namedtuple
+
+from .repository import EntityNotFound
+
+BattleResult = namedtuple('BattleResult', 'winner characters monsters')
+
+CHARACTERS_WIN = 'characters'
+MONSTERS_WIN = 'monsters'
+DRAW = 'draw'
+
+
+# characters.battle_power is maintained by triggers (see schema.py).
+CHARACTER_POWER_SQL = '''SELECT 'characters', name, battle_power FROM characters {where}'''
+
+MONSTER_POWER_SQL = '''SELECT 'monsters', name, battle_power FROM monsters {where}'''
+
+
+def where_in(column, names):
+    """``(clause, params)`` selecting rows whose ``column`` is one of ``names``.
+
+    ``None`` selects the whole table; anything else is bound as a JSON array.
+    """
+    if names is None:
+        return '', ()
+    return f'WHERE {column} IN (SELECT value FROM json_each(?))', (json.dumps(list(names)),)
+
+
+class BattleService:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def battle_powers(self, characters=(), monsters=()):
+        """Battle power for a set of characters and monsters in one query.
+
+        Returns ``(character_powers, monster_powers)`` as name -> power dicts.
+        Pass ``None`` for either side to cover its whole table.
+        """
+        char_where, char_params = where_in('name', characters)
+        monster_where, monster_params = where_in('name', monsters)
+        cur = self.conn.execute(
+            CHARACTER_POWER_SQL.format(where=char_where) + ' UNION ALL ' +
+            MONSTER_POWER_SQL.format(where=monster_where),
+            char_params + monster_params)
+
+        powers = {'characters': {}, 'monsters': {}}
+        for table, name, power in cur:
+            powers[table][name] = power
+        for table, names in (('characters', characters), ('monsters', monsters)):
+            for name in names or ():
+                if name not in powers[table]:
+                    raise EntityNotFound(name)
+        return powers['characters'], powers['monsters']
+
+    def battle_power(self, name, table):
+        """Battle power of ``name`` in ``table`` ("characters" or "monsters")."""
+        if table == "characters":
+            return self.battle_powers(characters=[name])[0][name]
+        elif table == "monsters":
+            return self.battle_powers(monsters=[name])[1][name]
+        raise ValueError(f"unknown table: {table!r}")
+
+    def calculate_battle(self, characters, monsters, char_modifier=0, monster_modifier=0):
+        """Compare the summed battle power of both sides plus their modifiers."""
+        char_powers, monster_powers = self.battle_powers(characters, monsters)
+        char_total = sum(char_powers[name] for name in characters)
+        monster_total = sum(monster_powers[name] for name in monsters)
+
+        final_char_power = char_total + char_modifier
+        final_monster_power = monster_total + monster_modifier
+
+        if final_char_power > final_monster_power:
+            winner = CHARACTERS_WIN
+        elif final_monster_power > final_char_power:
+            winner = MONSTERS_WIN
+        else:
+            winner = DRAW
+        return BattleResult(winner, final_char_power, final_monster_power)
+
+    def simulate_battle(self, characters, monsters, char_modifier=0, monster_modifier=0,
+                        battles=None, seed=None):
+        """Win/draw/loss rates of ``battles`` randomized battles (see ``trpgs4.simulate``).
+
+        Takes the same arguments as ``calculate_battle``; needs NumPy.
+        """
+        from .simulate import DEFAULT_BATTLES, simulate_powers
+
+        char_powers, monster_powers = self.battle_powers(characters, monsters)
+        return simulate_powers([char_powers[name] for name in characters],
+                               [monster_powers[name] for name in monsters],
+                               char_modifier, monster_modifier,
+                               battles or DEFAULT_BATTLES, seed)
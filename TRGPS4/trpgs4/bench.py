@@ -0,0 +1,240 @@
+"""Benchmarks for the data layer.
+
+Run ``python -m trpgs4.bench profiles`` to compare the connection profiles
+and ``python -m trpgs4.bench suite`` to time the operations the GUI performs
+on a generated campaign. Results are printed as JSON so runs can be diffed
+between versions.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from .db import PROFILES, configured_profile
+from .repository import PAGE_SIZE
+from .roster import Roster
+
+# Default campaign size for the suite
+CAMPAIGN = {'characters': 10000, 'armors': 1000, 'monsters': 5000, 'links_per_character': 4}
+
+ADJECTIVES = ('Ancient', 'Brave', 'Crimson', 'Dire', 'Elder', 'Frost', 'Grim', 'Hollow',
+              'Iron', 'Jade', 'Lost', 'Mighty', 'Night', 'Obsidian', 'Pale', 'Storm')
+HEROES = ('Archer', 'Bard', 'Cleric', 'Druid', 'Knight', 'Monk', 'Paladin', 'Ranger',
+          'Rogue', 'Sorcerer', 'Warlock', 'Wizard')
+GEAR = ('Boots', 'Bracers', 'Buckler', 'Cloak', 'Gauntlets', 'Greaves', 'Helm', 'Hauberk',
+        'Mail', 'Pauldrons', 'Shield', 'Tower Shield')
+BEASTS = ('Basilisk', 'Dragon', 'Gargoyle', 'Ghoul', 'Goblin', 'Hydra', 'Kobold', 'Lich',
+          'Manticore', 'Ogre', 'Troll', 'Wyvern')
+SEARCHES = ('a', 'dra', 'iron kn', 'storm wiz', 'zzz')
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 1) if seconds else None
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_profile(profile, commits=500, bulk_rows=20000, directory=None):
+    """Throughput of one profile on a fresh database file, in operations per second."""
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        roster = Roster.open(os.path.join(tmp, 'bench.db'), profile)
+        try:
+            def insert_commits():
+                for i in range(commits):
+                    roster.characters.add(f'Hero {i}', 'benchmark', 1)
+
+            def update_commits():
+                for i in range(commits):
+                    roster.characters.update_by_id(i % commits + 1, level=i)
+
+            def bulk_insert():
+                with roster.conn:
+                    roster.conn.executemany(
+                        "INSERT INTO monsters (name, description, battle_power) VALUES (?, ?, ?)",
+                        ((f'Monster {i}', 'benchmark', i % 100) for i in range(bulk_rows)))
+
+            def point_reads():
+                for i in range(commits):
+                    roster.characters.get_by_id(i % commits + 1)
+
+            return {
+                'journal_mode': roster.conn.execute("PRAGMA journal_mode").fetchone()[0],
+                'insert_commits_per_sec': _rate(commits, _timed(insert_commits)),
+                'update_commits_per_sec': _rate(commits, _timed(update_commits)),
+                'bulk_rows_per_sec': _rate(bulk_rows, _timed(bulk_insert)),
+                'point_reads_per_sec': _rate(commits, _timed(point_reads)),
+            }
+        finally:
+            roster.close()
+
+
+def bench_profiles(profiles=None, commits=500, bulk_rows=20000, directory=None):
+    return {
+        'sqlite_version': sqlite3.sqlite_version,
+        'commits': commits,
+        'bulk_rows': bulk_rows,
+        'profiles': {profile: bench_profile(profile, commits, bulk_rows, directory)
+                     for profile in profiles or PROFILES},
+    }
+
+
+def _name(rng, nouns, i):
+    # The counter keeps names unique; the words give search something to match
+    return f"{rng.choice(ADJECTIVES)} {rng.choice(nouns)} {i}"
+
+
+def generate_campaign(conn, characters=CAMPAIGN['characters'], armors=CAMPAIGN['armors'],
+                      monsters=CAMPAIGN['monsters'],
+                      links_per_character=CAMPAIGN['links_per_character'], seed=0):
+    """Fill an empty database with a synthetic campaign in one transaction.
+
+    The same sizes and ``seed`` always produce the same rows.
+    """
+    rng = random.Random(seed)
+    links_per_character = min(links_per_character, armors)
+    with conn:
+        conn.executemany(
+            "INSERT INTO armors (name, description, bonus) VALUES (?, ?, ?)",
+            [(_name(rng, GEAR, i), 'generated', rng.randint(0, 20)) for i in range(armors)])
+        conn.executemany(
+            "INSERT INTO characters (name, description, level) VALUES (?, ?, ?)",
+            [(_name(rng, HEROES, i), 'generated', rng.randint(1, 20)) for i in range(characters)])
+        conn.executemany(
+            "INSERT INTO monsters (name, description, battle_power) VALUES (?, ?, ?)",
+            [(_name(rng, BEASTS, i), 'generated', rng.randint(1, 200)) for i in range(monsters)])
+        armor_ids = [row[0] for row in conn.execute("SELECT id FROM armors ORDER BY id")]
+        character_ids = [row[0] for row in conn.execute("SELECT id FROM characters ORDER BY id")]
+        conn.executemany(
+            "INSERT INTO character_armor (character_id, armor_id) VALUES (?, ?)",
+            [(character_id, armor_id)
+             for character_id in character_ids
+             for armor_id in rng.sample(armor_ids, links_per_character)])
+
+
+def _measure(fn, repeat):
+    times = [_timed(fn) * 1000 for _ in range(repeat)]
+    return {
+        'runs': repeat,
+        'min_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'max_ms': round(max(times), 3),
+    }
+
+
+def bench_suite(profile=None, repeat=20, batch=50, participants=100, seed=0, directory=None,
+                **campaign):
+    """Time the GUI's data-layer calls on a generated campaign, in milliseconds.
+
+    ``campaign`` overrides the sizes in ``CAMPAIGN``. ``batch`` is the number
+    of characters and of armors in one equip/unequip call, ``participants``
+    the number of characters and of monsters on each side of a battle.
+    """
+    sizes = {**CAMPAIGN, **campaign}
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        roster = Roster.open(os.path.join(tmp, 'suite.db'), profile)
+        try:
+            generate_seconds = _timed(lambda: generate_campaign(roster.conn, seed=seed, **sizes))
+            conn = roster.conn
+            character_ids = [row[0] for row in conn.execute("SELECT id FROM characters ORDER BY id")]
+            character_names = [row[0] for row in conn.execute("SELECT name FROM characters ORDER BY id")]
+            armor_names = [row[0] for row in conn.execute("SELECT name FROM armors ORDER BY id")]
+            monster_names = [row[0] for row in conn.execute("SELECT name FROM monsters ORDER BY id")]
+
+            def sample(names, count):
+                return rng.sample(names, min(count, len(names)))
+
+            def list_refresh():
+                # What the GUI reloads after a write: the first page of each list
+                for repository in (roster.characters, roster.armors, roster.monsters):
+                    repository.page(0, PAGE_SIZE)
+
+            def name_search():
+                roster.characters.search(rng.choice(SEARCHES))
+
+            def load_character():
+                roster.characters.detail(rng.choice(character_ids))
+
+            equip_characters = sample(character_names, batch)
+            equip_armors = sample(armor_names, batch)
+
+            def equip_unequip():
+                roster.equipment.equip(equip_characters, equip_armors)
+                roster.equipment.unequip(equip_characters, equip_armors)
+
+            def battle_powers():
+                roster.battle.battle_powers(sample(character_names, participants),
+                                            sample(monster_names, participants))
+
+            def calculate_battle():
+                roster.battle.calculate_battle(sample(character_names, participants),
+                                               sample(monster_names, participants), 5, 5)
+
+            operations = {
+                'list_refresh': list_refresh,
+                'name_search': name_search,
+                'load_character': load_character,
+                'equip_unequip': equip_unequip,
+                'battle_powers': battle_powers,
+                'calculate_battle': calculate_battle,
+            }
+            return {
+                'sqlite_version': sqlite3.sqlite_version,
+                'profile': configured_profile(profile),
+                'seed': seed,
+                'campaign': sizes,
+                'batch': batch,
+                'participants': participants,
+                'generate_seconds': round(generate_seconds, 3),
+                'operations': {name: _measure(fn, repeat) for name, fn in operations.items()},
+            }
+        finally:
+            roster.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m trpgs4.bench', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    profiles = commands.add_parser('profiles', help='compare connection profiles')
+    profiles.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                          help='profile to run (repeatable; default: all)')
+    profiles.add_argument('--commits', type=int, default=500,
+                          help='single-row transactions per measurement')
+    profiles.add_argument('--bulk-rows', type=int, default=20000,
+                          help='rows written in the single-transaction measurement')
+    profiles.add_argument('--dir', help='directory for the scratch database (default: system temp)')
+
+    suite = commands.add_parser('suite', help='time GUI operations on a generated campaign')
+    for size, default in CAMPAIGN.items():
+        suite.add_argument(f"--{size.replace('_', '-')}", type=int, default=default)
+    suite.add_argument('--seed', type=int, default=0, help='campaign and sampling seed')
+    suite.add_argument('--repeat', type=int, default=20, help='runs per operation')
+    suite.add_argument('--batch', type=int, default=50,
+                       help='characters and armors per equip/unequip call')
+    suite.add_argument('--participants', type=int, default=100,
+                       help='characters and monsters per battle side')
+    suite.add_argument('--profile', choices=sorted(PROFILES), help='connection profile')
+    suite.add_argument('--dir', help='directory for the scratch database (default: system temp)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'profiles':
+        result = bench_profiles(args.profile, args.commits, args.bulk_rows, args.dir)
+    elif args.command == 'suite':
+        result = bench_suite(args.profile, args.repeat, args.batch, args.participants, args.seed,
+                             args.dir, **{size: getattr(args, size) for size in CAMPAIGN})
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Bounded LRU cache of entity records for the detail panes.
+
+Not thread-safe: the GUI uses it only from the Tk thread, filling it from
+worker results.
+"""
+from collections import OrderedDict
+
+CACHE_SIZE = 512
+
+
+class EntityCache:
+    """Records keyed by ``(table, row_id)``, least recently used dropped first.
+
+    Character entries are ``(character, equipment)`` with equipment as
+    ``(armor_id, name, bonus)`` rows, so the cache knows which cached
+    characters wear each armor and a change to that armor drops exactly
+    them. ``version`` goes up on every invalidation; ``put`` refuses values
+    read before the latest one, so a slow read cannot bring stale data back.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        # armor id -> ids of cached characters wearing it
+        self.wearers = {}
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, table, row_id):
+        key = (table, row_id)
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, table, row_id, value, version):
+        """Cache ``value`` if nothing was invalidated since ``version`` was read."""
+        if version != self.version:
+            return
+        key = (table, row_id)
+        if key in self.entries:
+            self._forget(key, self.entries[key])
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if table == 'characters':
+            for armor_id, name, bonus in value[1]:
+                self.wearers.setdefault(armor_id, set()).add(row_id)
+        while len(self.entries) > self.maxsize:
+            self._forget(*self.entries.popitem(last=False))
+
+    def _forget(self, key, value):
+        table, row_id = key
+        if table == 'characters':
+            for armor_id, name, bonus in value[1]:
+                wearers = self.wearers.get(armor_id)
+                if wearers is not None:
+                    wearers.discard(row_id)
+                    if not wearers:
+                        del self.wearers[armor_id]
+
+    def invalidate(self, table, row_id):
+        """Drop one row, and for an armor every cached character wearing it."""
+        self.version += 1
+        value = self.entries.pop((table, row_id), None)
+        if value is not None:
+            self._forget((table, row_id), value)
+        if table == 'armors':
+            for character_id in self.wearers.pop(row_id, ()):
+                value = self.entries.pop(('characters', character_id), None)
+                if value is not None:
+                    self._forget(('characters', character_id), value)
+
+    def invalidate_names(self, table, names):
+        """Drop the cached rows of ``table`` with any of ``names``."""
+        names = set(names)
+        for key, value in list(self.entries.items()):
+            if key[0] == table and _record(table, value).name in names:
+                self.invalidate(*key)
+        self.version += 1
+
+    def clear(self):
+        self.version += 1
+        self.entries.clear()
+        self.wearers.clear()
+
+
+def _record(table, value):
+    return value[0] if table == 'characters' else value
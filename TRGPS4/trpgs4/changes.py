@@ -0,0 +1,85 @@
+"""Catching up with rows changed since a view was last current.
+
+Triggers append ``(seq, table_name, row_id)`` to ``change_log`` for every
+insert, update and delete of a character, armor or monster. A view keeps the
+highest ``seq`` it has applied and asks for what happened after it; the
+answer costs the number of rows changed, not the size of the tables.
+
+Several programs may share one database file. ``ChangeWatcher`` tells
+cheaply whether anyone has committed since it last looked, so a front end
+can poll it on a timer and only read the log when something happened.
+"""
+import json
+from collections import namedtuple
+
+from .db import connect
+from .schema import NAMED_TABLES
+
+Changes = namedtuple('Changes', 'seq reset rows deleted newest')
+Changes.__doc__ = """Rows changed after a sequence number.
+
+``rows`` maps each table to the ``(id, name)`` rows inserted or changed,
+``deleted`` to the ids that no longer exist, and ``newest`` to ``{id: seq}``
+of each row's latest change, so a caller can tell its own writes from
+others'. ``reset`` means the log no longer reaches back that far and the
+views must reload; ``seq`` is the number to pass next time.
+"""
+
+
+def latest_change(conn):
+    """The sequence number of the newest logged change, 0 if there is none."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def changes_since(conn, seq):
+    """Collect the rows changed after ``seq`` into ``Changes``."""
+    first = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+    if first is not None and first > seq + 1:
+        return Changes(latest_change(conn), True, {}, {}, {})
+
+    newest = {}
+    # Leaves seq at the newest entry read
+    for seq, table, row_id in conn.execute(
+            "SELECT seq, table_name, row_id FROM change_log WHERE seq > ? ORDER BY seq", (seq,)):
+        newest.setdefault(table, {})[row_id] = seq
+
+    rows, deleted = {}, {}
+    for table, ids in newest.items():
+        if table not in NAMED_TABLES:
+            continue
+        rows[table] = conn.execute(
+            f"SELECT id, name FROM {table} WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+            (json.dumps(sorted(ids)),)).fetchall()
+        deleted[table] = sorted(ids.keys() - {row_id for row_id, name in rows[table]})
+    return Changes(seq, False, rows, deleted, newest)
+
+
+class ChangeWatcher:
+    """Notices commits made to a database file through any other connection.
+
+    ``PRAGMA data_version`` on the watcher's own connection changes whenever
+    another connection, in this process or another, commits; checking it
+    takes microseconds and reads nothing from disk, so an idle poll is free.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.data_version = self._read()
+
+    @classmethod
+    def open(cls, path=None, profile=None):
+        return cls(connect(path, profile))
+
+    def _read(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changed(self):
+        """Whether anything was committed since the previous call."""
+        data_version = self._read()
+        if data_version == self.data_version:
+            return False
+        self.data_version = data_version
+        return True
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,225 @@
+"""Command-line access to the roster, for scripts and campaign upkeep.
+
+    python -m trpgs4 add characters Aria "Elven ranger" 3
+    python -m trpgs4 equip --characters Aria Borin --armors "Chain Mail"
+    python -m trpgs4 battle --characters Aria Borin --monsters Ogre --monster-modifier 2
+    python -m trpgs4 delete monsters --input retired.csv
+    python -m trpgs4 batch session.jsonl
+
+Every command also takes ``--input FILE`` ("-" for stdin): CSV or JSON Lines
+records with the fields of its arguments (``name``, ``description``, the
+table's integer column; ``query``; ``characters``, ``armors``, ``monsters``,
+``char_modifier``, ``monster_modifier``). ``batch`` mixes commands, each
+record naming its ``command`` and ``table``. A run is one transaction: if
+any record fails, nothing is written, the error goes to stderr as JSON and
+the exit status is 1. Otherwise one JSON line per record is printed.
+
+Only the data layer is imported, never Tk.
+"""
+import argparse
+import contextlib
+import json
+import sys
+
+from .db import PROFILES
+from .repository import DuplicateNameError, EntityNotFound
+from .roster import Roster
+from .transfer import ENTITY_COLUMNS, FORMATS, TransferError, entity_row, guess_format, read_records
+
+TABLES = tuple(ENTITY_COLUMNS)
+
+
+def _names(record, side):
+    # JSON gives lists; a CSV cell or a singular key ("armor") gives one name
+    names = record.get(side, record.get(side[:-1]))
+    if names in (None, ''):
+        return []
+    if isinstance(names, str):
+        return [names]
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError(f"{side} must be a list of names")
+    return names
+
+
+def _modifier(record, key):
+    value = record.get(key)
+    if value in (None, ''):
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer, not {value!r}") from None
+
+
+def _add(roster, line, table, record):
+    row = entity_row(table, line, record)
+    row_id = getattr(roster, table).insert(dict(zip(ENTITY_COLUMNS[table], row)))
+    return {'table': table, 'name': row[0], 'id': row_id}
+
+
+def _delete(roster, line, table, record):
+    name = record.get('name')
+    if not name:
+        raise ValueError("name is required")
+    return {'table': table, 'name': name, 'deleted': getattr(roster, table).remove(name)}
+
+
+def _search(roster, line, table, record):
+    query = record.get('query') or ''
+    limit = record.get('limit')
+    rows = getattr(roster, table).search(query, *(() if limit in (None, '') else (int(limit),)))
+    return {'table': table, 'query': query,
+            'rows': [{'id': row_id, 'name': name} for row_id, name in rows]}
+
+
+def _equip(roster, line, table, record):
+    characters, armors = _names(record, 'characters'), _names(record, 'armors')
+    return {'characters': characters, 'armors': armors,
+            'created': roster.equipment.link(characters, armors)}
+
+
+def _unequip(roster, line, table, record):
+    characters, armors = _names(record, 'characters'), _names(record, 'armors')
+    return {'characters': characters, 'armors': armors,
+            'removed': roster.equipment.unlink(characters, armors)}
+
+
+def _battle(roster, line, table, record):
+    result = roster.battle.calculate_battle(
+        _names(record, 'characters'), _names(record, 'monsters'),
+        _modifier(record, 'char_modifier'), _modifier(record, 'monster_modifier'))
+    return result._asdict()
+
+
+HANDLERS = {
+    'add': _add,
+    'delete': _delete,
+    'search': _search,
+    'equip': _equip,
+    'unequip': _unequip,
+    'battle': _battle,
+}
+# Commands whose records need a table
+TABLE_COMMANDS = ('add', 'delete', 'search')
+
+
+def run(roster, operations):
+    """Apply ``(command, table, record)`` operations in one transaction.
+
+    Returns one result dict per operation. The first failure raises
+    ``TransferError`` naming its record, and nothing is committed.
+    """
+    results = []
+    with roster.conn:
+        for line, (command, table, record) in enumerate(operations, start=1):
+            if not isinstance(record, dict):
+                raise TransferError(line, "record must be an object")
+            if command not in HANDLERS:
+                raise TransferError(line, f"unknown command {command!r}")
+            if command in TABLE_COMMANDS and table not in TABLES:
+                raise TransferError(line, f"unknown table {table!r}")
+            try:
+                result = HANDLERS[command](roster, line, table, record)
+            except EntityNotFound as error:
+                raise TransferError(line, f"{error.args[0]} does not exist") from error
+            except DuplicateNameError as error:
+                raise TransferError(line, f"{error.args[0]} already exists") from error
+            except TransferError:
+                raise
+            except ValueError as error:
+                raise TransferError(line, str(error)) from error
+            results.append({'command': command, **result})
+    return results
+
+
+def _operations(args):
+    """The ``(command, table, record)`` operations the parsed arguments ask for."""
+    if args.command == 'batch' or args.input:
+        path = args.file if args.command == 'batch' else args.input
+        # Only close what was opened here, never stdin
+        opened = (contextlib.nullcontext(sys.stdin) if path == '-'
+                  else open(path, newline='', encoding='utf-8'))
+        with opened as fp:
+            records = list(read_records(fp, args.format or guess_format(path)))
+        if args.command == 'batch':
+            # Records that are not objects are rejected by ``run``
+            return [(record.get('command'), record.get('table'), record) if isinstance(record, dict)
+                    else (None, None, record) for record in records]
+        return [(args.command, getattr(args, 'table', None), record) for record in records]
+
+    if args.command == 'add':
+        integer = ENTITY_COLUMNS[args.table][2]
+        records = [{'name': args.name, 'description': args.description, integer: args.value}]
+    elif args.command == 'delete':
+        records = [{'name': name} for name in args.names]
+    elif args.command == 'search':
+        records = [{'query': args.query, 'limit': args.limit}]
+    elif args.command in ('equip', 'unequip'):
+        records = [{'characters': args.characters, 'armors': args.armors}]
+    else:
+        records = [{'characters': args.characters, 'monsters': args.monsters,
+                    'char_modifier': args.char_modifier, 'monster_modifier': args.monster_modifier}]
+    return [(args.command, getattr(args, 'table', None), record) for record in records]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m trpgs4', description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='database file (default: $TRPGS4_DB or rpg_characters.db)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), help='connection profile')
+    parser.add_argument('--format', choices=FORMATS, help='input file format (default: from the file name)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def command(name, help, table=True):
+        subparser = commands.add_parser(name, help=help)
+        if table:
+            subparser.add_argument('table', choices=TABLES)
+        subparser.add_argument('--input', metavar='FILE', help='records to process ("-" for stdin)')
+        return subparser
+
+    adder = command('add', 'add a row')
+    adder.add_argument('name', nargs='?')
+    adder.add_argument('description', nargs='?')
+    adder.add_argument('value', nargs='?', type=int,
+                       help='level, bonus or battle power (default: 1, 0 or 1)')
+
+    command('delete', 'delete rows by name').add_argument('names', nargs='*')
+
+    searcher = command('search', 'search names and descriptions')
+    searcher.add_argument('query', nargs='?', default='')
+    searcher.add_argument('--limit', type=int)
+
+    for name in ('equip', 'unequip'):
+        linker = command(name, f'{name} every armor on every character', table=False)
+        linker.add_argument('--characters', nargs='+', default=[])
+        linker.add_argument('--armors', nargs='+', default=[])
+
+    battler = command('battle', 'compare the battle power of two sides', table=False)
+    battler.add_argument('--characters', nargs='*', default=[])
+    battler.add_argument('--monsters', nargs='*', default=[])
+    battler.add_argument('--char-modifier', type=int, default=0)
+    battler.add_argument('--monster-modifier', type=int, default=0)
+
+    batcher = commands.add_parser('batch', help='run mixed commands from a file ("-" for stdin)')
+    batcher.add_argument('file')
+
+    args = parser.parse_args(argv)
+    try:
+        operations = _operations(args)
+    except TransferError as error:
+        print(json.dumps({'error': error.message, 'record': error.line}), file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as error:
+        print(json.dumps({'error': str(error)}), file=sys.stderr)
+        return 1
+
+    roster = Roster.open(args.db, args.profile)
+    try:
+        results = run(roster, operations)
+    except TransferError as error:
+        print(json.dumps({'error': error.message, 'record': error.line}), file=sys.stderr)
+        return 1
+    finally:
+        roster.close()
+    for result in results:
+        print(json.dumps(result))
+    return 0
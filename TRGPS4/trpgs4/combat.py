@@ -0,0 +1,183 @@
+"""Round-by-round combat between characters and monsters.
+
+Every combatant is loaded in one query, with its stats derived from battle
+power (for characters, split into level and armor bonus):
+
+    hit points  BASE_HP + 2 * power, at least 1
+    attack      1 + power // 2, plus the side's modifier
+    defense     armor bonus // 2 for characters, power // 4 for monsters
+
+Each round everyone rolls initiative (d20 + attack // 4) and acts in that
+order off a heap. An attack hits the living enemy with the fewest hit
+points for ``attack + d6 - defense`` damage, at least 1. Each side's
+living combatants sit in a heap of ``(hit points, index)``; the target is
+always its top, so a hit is one ``heapreplace`` and neither turn order nor
+targeting scans the field. ``Combat.events()`` yields the log as it
+happens.
+"""
+import heapq
+import json
+import random
+from collections import namedtuple
+
+from .battle import CHARACTERS_WIN, DRAW, MONSTERS_WIN, where_in
+from .repository import EntityNotFound
+
+BASE_HP = 10
+MAX_ROUNDS = 1000
+
+CHARACTERS = 'characters'
+MONSTERS = 'monsters'
+
+# Event kinds
+ROUND = 'round'
+ATTACK = 'attack'
+DEFEATED = 'defeated'
+END = 'end'
+
+# ``amount`` is damage for attacks, the winner for the end event
+Event = namedtuple('Event', 'round kind actor target amount')
+CombatResult = namedtuple('CombatResult', 'winner rounds characters monsters')
+
+
+class Combatant:
+    __slots__ = ('name', 'side', 'hp', 'attack', 'defense')
+
+    def __init__(self, name, side, hp, attack, defense):
+        self.name = name
+        self.side = side
+        self.hp = hp
+        self.attack = attack
+        self.defense = defense
+
+    def __repr__(self):
+        return f"Combatant({self.name!r}, {self.side!r}, hp={self.hp})"
+
+
+def _hp(battle_power):
+    # A very negative power would otherwise start a combatant already down
+    return max(1, BASE_HP + 2 * battle_power)
+
+
+def character(name, level, battle_power, modifier=0):
+    return Combatant(name, CHARACTERS, _hp(battle_power), 1 + battle_power // 2 + modifier,
+                     (battle_power - level) // 2)
+
+
+def monster(name, battle_power, modifier=0):
+    return Combatant(name, MONSTERS, _hp(battle_power), 1 + battle_power // 2 + modifier,
+                     battle_power // 4)
+
+
+class Combat:
+    """One battle over a list of ``Combatant``; ``events()`` runs it."""
+
+    def __init__(self, combatants, seed=None, max_rounds=MAX_ROUNDS):
+        self.combatants = combatants
+        self.rng = random.Random(seed)
+        self.max_rounds = max_rounds
+        self.rounds = 0
+        self.winner = None
+        self.alive = {CHARACTERS: 0, MONSTERS: 0}
+        # Living combatants of each side by (hp, index), for the side attacking them
+        self.targets = {CHARACTERS: [], MONSTERS: []}
+        for index, combatant in enumerate(combatants):
+            # Anyone who starts without hit points never acts or can be hit
+            if combatant.hp <= 0:
+                continue
+            self.alive[combatant.side] += 1
+            self.targets[combatant.side].append((combatant.hp, index))
+        for heap in self.targets.values():
+            heapq.heapify(heap)
+
+    def events(self):
+        """Fight until one side is gone or ``max_rounds`` pass, yielding every ``Event``."""
+        combatants = self.combatants
+        rng = self.rng
+        enemy = {CHARACTERS: MONSTERS, MONSTERS: CHARACTERS}
+        while self.alive[CHARACTERS] and self.alive[MONSTERS] and self.rounds < self.max_rounds:
+            self.rounds += 1
+            yield Event(self.rounds, ROUND, None, None, None)
+            turns = [(-(rng.randint(1, 20) + c.attack // 4), index)
+                     for index, c in enumerate(combatants) if c.hp > 0]
+            heapq.heapify(turns)
+            while turns:
+                actor = combatants[heapq.heappop(turns)[1]]
+                if actor.hp <= 0:
+                    continue
+                side = enemy[actor.side]
+                if not self.targets[side]:
+                    break
+                index = self.targets[side][0][1]
+                target = combatants[index]
+                damage = max(1, actor.attack + rng.randint(1, 6) - target.defense)
+                target.hp -= damage
+                yield Event(self.rounds, ATTACK, actor.name, target.name, damage)
+                if target.hp > 0:
+                    heapq.heapreplace(self.targets[side], (target.hp, index))
+                else:
+                    heapq.heappop(self.targets[side])
+                    self.alive[side] -= 1
+                    yield Event(self.rounds, DEFEATED, None, target.name, None)
+
+        if self.alive[CHARACTERS] and not self.alive[MONSTERS]:
+            self.winner = CHARACTERS_WIN
+        elif self.alive[MONSTERS] and not self.alive[CHARACTERS]:
+            self.winner = MONSTERS_WIN
+        else:
+            self.winner = DRAW
+        yield Event(self.rounds, END, None, None, self.winner)
+
+    def resolve(self):
+        """Run the whole battle without keeping the log."""
+        for _ in self.events():
+            pass
+        return self.result()
+
+    def result(self):
+        return CombatResult(self.winner, self.rounds, self.alive[CHARACTERS], self.alive[MONSTERS])
+
+
+def write_events(events, fp):
+    """Write events to ``fp`` as JSON Lines while they are produced."""
+    for event in events:
+        fp.write(json.dumps({field: value for field, value in event._asdict().items()
+                             if value is not None}) + '\n')
+
+
+class CombatService:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def combatants(self, characters, monsters, char_modifier=0, monster_modifier=0):
+        """Build one ``Combatant`` per listed name in one query; repeated names fight as copies.
+
+        ``None`` for either side takes its whole table.
+        """
+        char_where, char_params = where_in('name', None if characters is None else set(characters))
+        monster_where, monster_params = where_in('name', None if monsters is None else set(monsters))
+        rows = {CHARACTERS: {}, MONSTERS: {}}
+        cur = self.conn.execute(
+            f'''SELECT 'characters', name, level, battle_power FROM characters {char_where}
+                UNION ALL
+                SELECT 'monsters', name, 0, battle_power FROM monsters {monster_where}''',
+            char_params + monster_params)
+        for side, name, level, battle_power in cur:
+            rows[side][name] = level, battle_power
+
+        combatants = []
+        for name in rows[CHARACTERS] if characters is None else characters:
+            if name not in rows[CHARACTERS]:
+                raise EntityNotFound(name)
+            combatants.append(character(name, *rows[CHARACTERS][name], char_modifier))
+        for name in rows[MONSTERS] if monsters is None else monsters:
+            if name not in rows[MONSTERS]:
+                raise EntityNotFound(name)
+            combatants.append(monster(name, rows[MONSTERS][name][1], monster_modifier))
+        return combatants
+
+    def battle(self, characters, monsters, char_modifier=0, monster_modifier=0, seed=None,
+               max_rounds=MAX_ROUNDS):
+        """A ``Combat`` ready to run; it holds no reference to the connection."""
+        return Combat(self.combatants(characters, monsters, char_modifier, monster_modifier),
+                      seed, max_rounds)
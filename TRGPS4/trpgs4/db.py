@@ -0,0 +1,79 @@
+"""Connection helpers.
+
+The database path and connection profile default to the ``TRPGS4_DB`` and
+``TRPGS4_PROFILE`` environment variables, falling back to
+``rpg_characters.db`` and the "safe" profile.
+"""
+import os
+import sqlite3
+
+from .schema import migrate
+
+DEFAULT_PATH = 'rpg_characters.db'
+DEFAULT_PROFILE = 'safe'
+
+PATH_ENV = 'TRPGS4_DB'
+PROFILE_ENV = 'TRPGS4_PROFILE'
+
+# PRAGMA settings per profile. cache_size is negative KiB, mmap_size bytes.
+PROFILES = {
+    # Every commit is durable; WAL still lets readers run alongside the writer.
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8192,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'foreign_keys': 'ON',
+    },
+    # A power cut can lose the last few commits but never corrupts the file.
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+    # For one-off loads into a file that can be rebuilt if the import dies.
+    'bulk-import': {
+        'journal_mode': 'MEMORY',
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+}
+
+
+def configured_path(path=None):
+    return path or os.environ.get(PATH_ENV) or DEFAULT_PATH
+
+
+def configured_profile(profile=None):
+    profile = profile or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE
+    if profile not in PROFILES:
+        raise ValueError(f"unknown connection profile {profile!r}; "
+                         f"choose from {', '.join(PROFILES)}")
+    return profile
+
+
+def apply_profile(conn, profile):
+    for pragma, value in PROFILES[configured_profile(profile)].items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def connect(path=None, profile=None, instrumentation=None, **kwargs):
+    """Open ``path`` with ``profile`` and migrate it to the current schema version.
+
+    Statements are reported to ``instrumentation`` if one is given (see
+    ``trpgs4.instrument``). Extra keyword arguments are passed on to
+    ``sqlite3.connect``.
+    """
+    if instrumentation is not None:
+        kwargs['factory'] = instrumentation.connection_factory
+    conn = sqlite3.connect(configured_path(path), **kwargs)
+    apply_profile(conn, profile)
+    migrate(conn)
+    return conn
@@ -0,0 +1,149 @@
+"""Encounter builder: monster groups whose total power lands in a target band.
+
+The search is a bounded knapsack over the distinct monster powers, run as a
+bitset DP per group size: ``reach[k]`` has bit ``s`` set when some group of
+``k`` monsters totals ``s``. Each state remembers the power and count that
+first reached it, so one group per reachable (size, total) can be rebuilt
+by walking those back. Cost grows with the number of distinct powers, the
+group size limit and the top of the band, not with the number of monsters.
+"""
+import json
+from collections import namedtuple
+
+from .battle import BattleService
+from .repository import EntityNotFound
+
+DEFAULT_OPTIONS = 5
+MAX_MONSTERS = 6
+MAX_PER_MONSTER = 4
+
+# Monster power relative to party power
+DIFFICULTIES = {
+    'easy': (0.5, 0.75),
+    'medium': (0.75, 1.0),
+    'hard': (1.0, 1.25),
+    'deadly': (1.25, 1.5),
+}
+
+Encounter = namedtuple('Encounter', 'total margin monsters')
+
+
+def difficulty_band(party_power, difficulty):
+    """The ``(low, high)`` monster power band for a difficulty name."""
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"unknown difficulty {difficulty!r}; choose from {', '.join(DIFFICULTIES)}")
+    low, high = DIFFICULTIES[difficulty]
+    return round(party_power * low), round(party_power * high)
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def build_groups(monsters, low, high, party_power=None, options=DEFAULT_OPTIONS,
+                 max_monsters=MAX_MONSTERS, max_per_monster=MAX_PER_MONSTER, required=()):
+    """The best ``options`` monster groups totalling between ``low`` and ``high``.
+
+    ``monsters`` is a sequence of ``(name, power)`` pairs. Every group holds
+    the ``required`` names (repeats allowed), at most ``max_monsters``
+    monsters and no monster more than ``max_per_monster`` times. Groups are
+    ranked by distance from the middle of the band, then by size; no two
+    share both size and total. ``margin`` is measured from ``party_power``
+    (default: the middle of the band).
+    """
+    powers = dict(monsters)
+    missing = [name for name in required if name not in powers]
+    if missing:
+        raise EntityNotFound(missing[0])
+    required = list(required)
+    uses = {name: required.count(name) for name in set(required)}
+    if any(count > max_per_monster for count in uses.values()) or len(required) > max_monsters:
+        return []
+
+    base = sum(powers[name] for name in required)
+    target = (low + high) / 2
+    if party_power is None:
+        party_power = target
+    slots = max_monsters - len(required)
+    # Totals of the free monsters must land in [low, high] once base is added
+    top = high - base
+    if top < 0:
+        return []
+    bottom = max(low - base, 0)
+
+    # Copies available per distinct power, and the monsters supplying them
+    supply = {}
+    for name, power in monsters:
+        free = max_per_monster - uses.get(name, 0)
+        if 0 <= power <= top and free > 0:
+            supply.setdefault(power, []).append((name, free))
+
+    mask = (1 << (top + 1)) - 1
+    reach = [1] + [0] * slots
+    parent = {}
+    stages = sorted(supply)
+    for stage, power in enumerate(stages):
+        limit = min(sum(free for name, free in supply[power]), slots)
+        before = reach[:]
+        for count in range(1, limit + 1):
+            shift = power * count
+            for size in range(slots, count - 1, -1):
+                fresh = (before[size - count] << shift) & mask & ~reach[size]
+                if fresh:
+                    reach[size] |= fresh
+                    for total in _bits(fresh):
+                        parent[size, total] = stage, count
+
+    window = mask >> bottom << bottom
+    ranked = []
+    for size in range(0 if required else 1, slots + 1):
+        for total in _bits(reach[size] & window):
+            ranked.append((abs(base + total - target), size, total))
+    ranked.sort()
+
+    groups = []
+    for distance, size, total in ranked[:options]:
+        names = list(required)
+        group_total = total
+        while size:
+            stage, count = parent[size, total]
+            power = stages[stage]
+            size -= count
+            total -= power * count
+            for name, free in supply[power]:
+                take = min(free, count)
+                names.extend([name] * take)
+                count -= take
+                if not count:
+                    break
+        groups.append(Encounter(base + group_total, base + group_total - party_power, names))
+    return groups
+
+
+class EncounterService:
+    def __init__(self, conn):
+        self.conn = conn
+        self.battle = BattleService(conn)
+
+    def party_power(self, characters, char_modifier=0):
+        char_powers = self.battle.battle_powers(characters, ())[0]
+        return sum(char_powers[name] for name in characters) + char_modifier
+
+    def build(self, characters, difficulty='medium', char_modifier=0, band=None, **limits):
+        """Monster groups for the party ``characters`` at ``difficulty``.
+
+        ``band`` is an explicit ``(low, high)`` that overrides the difficulty;
+        ``limits`` are passed on to ``build_groups``.
+        """
+        party_power = self.party_power(characters, char_modifier)
+        low, high = band or difficulty_band(party_power, difficulty)
+        required = limits.get('required', ())
+        # Only monsters that fit under the band can be picked, besides the required ones
+        monsters = self.conn.execute(
+            '''SELECT name, battle_power FROM monsters
+               WHERE battle_power <= ? OR name IN (SELECT value FROM json_each(?))''',
+            (high, json.dumps(list(required)))).fetchall()
+        return build_groups(monsters, low, high, party_power, **limits)
@@ -0,0 +1,197 @@
+"""Query instrumentation.
+
+An ``Instrumentation`` collects, for every connection opened through its
+``connection_factory`` (``connect(..., instrumentation=...)``):
+
+* call counts, total time and a latency histogram per SQL statement;
+* database round trips per user action, marked with ``action(name)``;
+* a slow-query log on the ``trpgs4.slow`` logger, with the statement's
+  ``EXPLAIN QUERY PLAN`` attached.
+
+Timings cover ``execute``/``executemany`` (preparing the statement and
+running it to its first row) and commits; rows fetched later from the
+returned cursor are not included. Recording one statement costs two clock
+reads and a dict update under a lock, so it can stay on in normal use.
+"""
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+SLOW_MS = 50.0
+
+slow_log = logging.getLogger('trpgs4.slow')
+
+# The user action the current code runs on behalf of. DatabaseWorker and
+# TkDispatcher carry it over to the threads and callbacks they run.
+_action = contextvars.ContextVar('trpgs4_action', default=None)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def current_action():
+    return _action.get()
+
+
+class _Statement:
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # bit length of the duration in microseconds -> calls
+        self.buckets = {}
+
+
+def _percentile_ms(buckets, count, fraction):
+    # Upper bound of the histogram bucket holding the percentile
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen >= count * fraction:
+            return 2 ** bucket / 1000
+    return None
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """A connection that reports its statements to ``instrumentation``."""
+
+    instrumentation = None
+
+    def execute(self, sql, parameters=(), /):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.instrumentation.record(sql, time.perf_counter() - start, self, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.instrumentation.record(sql, time.perf_counter() - start)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            self.instrumentation.record('COMMIT', time.perf_counter() - start)
+
+    # ``with conn:`` commits without going through ``commit()``
+    def __exit__(self, exc_type, exc_value, traceback):
+        start = time.perf_counter()
+        try:
+            return super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.instrumentation.record('COMMIT' if exc_type is None else 'ROLLBACK',
+                                        time.perf_counter() - start)
+
+
+class Instrumentation:
+    """Statement and action statistics shared by any number of connections."""
+
+    def __init__(self, slow_ms=SLOW_MS, explain=True):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.statements = {}
+        # action name -> [times performed, round trips]
+        self.actions = {}
+        self.slow = 0
+        self._sql_keys = {}
+        self._lock = threading.Lock()
+        self.connection_factory = type('InstrumentedConnection', (InstrumentedConnection,),
+                                       {'instrumentation': self})
+
+    def record(self, sql, seconds, conn=None, parameters=None):
+        """Count one round trip of ``sql`` that took ``seconds``."""
+        key = self._sql_keys.get(sql)
+        if key is None:
+            key = self._sql_keys.setdefault(sql, _WHITESPACE.sub(' ', sql).strip())
+        bucket = int(seconds * 1e6).bit_length()
+        action = _action.get()
+        with self._lock:
+            stat = self.statements.get(key)
+            if stat is None:
+                stat = self.statements[key] = _Statement()
+            stat.count += 1
+            stat.total += seconds
+            if seconds > stat.max:
+                stat.max = seconds
+            stat.buckets[bucket] = stat.buckets.get(bucket, 0) + 1
+            if action is not None:
+                self.actions.setdefault(action, [0, 0])[1] += 1
+        if seconds * 1000 >= self.slow_ms:
+            self._log_slow(key, sql, seconds, conn, parameters, action)
+
+    def _log_slow(self, key, sql, seconds, conn, parameters, action):
+        with self._lock:
+            self.slow += 1
+        plan = ''
+        if self.explain and conn is not None and parameters is not None:
+            try:
+                rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, parameters)
+                plan = ''.join(f'\n    {row[-1]}' for row in rows)
+            except sqlite3.Error:
+                pass
+        slow_log.warning('%.1f ms%s: %s%s', seconds * 1000,
+                         f' in {action}' if action else '', key, plan)
+
+    @contextlib.contextmanager
+    def action(self, name):
+        """Count the round trips made while the block, and work it starts, runs."""
+        with self._lock:
+            self.actions.setdefault(name, [0, 0])[0] += 1
+        token = _action.set(name)
+        try:
+            yield
+        finally:
+            _action.reset(token)
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.actions.clear()
+            self.slow = 0
+
+    def summary(self):
+        """Statements by total time, round trips per action and the slow-query count."""
+        with self._lock:
+            statements = sorted(self.statements.items(), key=lambda item: item[1].total,
+                                reverse=True)
+            return {
+                'statements': [{
+                    'sql': sql,
+                    'count': stat.count,
+                    'total_ms': round(stat.total * 1000, 3),
+                    'mean_ms': round(stat.total * 1000 / stat.count, 3),
+                    'p50_ms': _percentile_ms(stat.buckets, stat.count, 0.5),
+                    'p95_ms': _percentile_ms(stat.buckets, stat.count, 0.95),
+                    'max_ms': round(stat.max * 1000, 3),
+                    'histogram_us': {f'<{2 ** bucket}': calls
+                                     for bucket, calls in sorted(stat.buckets.items())},
+                } for sql, stat in statements],
+                'actions': {name: {
+                    'count': count,
+                    'round_trips': round_trips,
+                    'per_action': round(round_trips / count, 2) if count else None,
+                } for name, (count, round_trips) in sorted(self.actions.items())},
+                'slow_queries': self.slow,
+            }
+
+    def dump(self, fp=None):
+        """Write ``summary()`` as JSON to ``fp`` (default: stderr)."""
+        fp = fp or sys.stderr
+        json.dump(self.summary(), fp, indent=2)
+        print(file=fp)
+
+    def dump_at_exit(self, fp=None):
+        atexit.register(self.dump, fp)
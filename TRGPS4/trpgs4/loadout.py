@@ -0,0 +1,169 @@
+"""Loadout optimizer: share a pool of armors out across a party.
+
+Battle power is level plus the bonuses of equipped armor, so an armor adds
+the same power whoever wears it. Armors are handed out best bonus first,
+each copy to the eligible character with the most room left ("total": the
+party's summed power) or with the lowest power so far ("weakest": the
+party's minimum power). Armors without a positive bonus are never assigned.
+
+For "total" without slot limits this greedy order is optimal. For
+"weakest" it is a heuristic once copies are limited: splitting a pool
+evenly is a partition problem, and e.g. bonuses 3, 3, 2, 2, 2 over two
+characters give a minimum of 5 where 6 (3+3 against 2+2+2) is possible.
+
+Only armor in the pool is reassigned; anything else a character wears
+stays on, counts towards its power and takes up one of its items.
+"""
+import heapq
+import json
+from collections import namedtuple
+
+from .repository import EntityNotFound, EquipmentRepository
+
+OBJECTIVES = ('total', 'weakest')
+MAX_ITEMS = 4
+
+# ``assignments`` maps character name -> armor names, ``powers`` name -> battle power
+# ``pool`` names the armors being reassigned
+Loadout = namedtuple('Loadout', 'objective value assignments powers pool')
+
+
+def _limit(limit, name, default):
+    return limit.get(name, default) if isinstance(limit, dict) else limit
+
+
+def plan_loadout(characters, armors, objective='total', max_items=MAX_ITEMS, copies=None,
+                 slots=None, slot_limits=None):
+    """Assign ``armors`` (``(name, bonus)`` pairs) to ``characters`` (``(name, power)`` pairs).
+
+    ``power`` is what a character has before any of ``armors``: its level
+    plus whatever other armor it keeps.
+
+    ``max_items`` caps the armors per character and ``copies`` the
+    characters wearing the same armor (``None``: no limit, 1: unique
+    items); either may be a dict keyed by name instead of one number.
+    ``slots`` maps armor names to a slot, and ``slot_limits`` caps how many
+    armors of each slot one character wears.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}")
+    powers = dict(characters)
+    room = {name: _limit(max_items, name, MAX_ITEMS) for name in powers}
+    worn = {name: {} for name in powers}
+    assignments = {name: [] for name in powers}
+
+    def key(name):
+        return -room[name] if objective == 'total' else powers[name]
+
+    # Every character with room is in the heap exactly once
+    heap = [(key(name), name) for name in powers if room[name] > 0]
+    heapq.heapify(heap)
+    for armor, bonus in sorted(dict(armors).items(), key=lambda item: -item[1]):
+        if bonus <= 0 or not heap:
+            break
+        wanted = _limit(copies, armor, None)
+        slot = slots.get(armor) if slots else None
+        slot_limit = slot_limits.get(slot) if slot is not None and slot_limits else None
+
+        taken, passed = [], []
+        while heap and (wanted is None or len(taken) < wanted):
+            entry = heapq.heappop(heap)
+            name = entry[1]
+            if slot_limit is not None and worn[name].get(slot, 0) >= slot_limit:
+                passed.append(entry)
+            else:
+                taken.append(name)
+        for name in taken:
+            assignments[name].append(armor)
+            powers[name] += bonus
+            room[name] -= 1
+            if slot is not None:
+                worn[name][slot] = worn[name].get(slot, 0) + 1
+            if room[name] > 0:
+                heapq.heappush(heap, (key(name), name))
+        for entry in passed:
+            heapq.heappush(heap, entry)
+
+    if objective == 'total':
+        value = sum(powers.values())
+    else:
+        value = min(powers.values(), default=0)
+    return Loadout(objective, value, assignments, powers, tuple(dict(armors)))
+
+
+class LoadoutService:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _rows(self, table, column, names):
+        if names is None:
+            return self.conn.execute(f"SELECT name, {column} FROM {table}").fetchall()
+        rows = self.conn.execute(
+            f"SELECT name, {column} FROM {table} WHERE name IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(names)),)).fetchall()
+        found = {name for name, value in rows}
+        for name in names:
+            if name not in found:
+                raise EntityNotFound(name)
+        return rows
+
+    def _kept(self, characters, pool):
+        """``{name: (power, items)}`` of ``characters`` leaving out the armors in ``pool``."""
+        rows = self.conn.execute(
+            '''SELECT characters.name,
+                      characters.battle_power - COALESCE(SUM(armors.bonus), 0),
+                      COUNT(character_armor.armor_id) - COUNT(armors.id)
+               FROM characters
+               LEFT JOIN character_armor ON character_armor.character_id = characters.id
+               LEFT JOIN armors ON armors.id = character_armor.armor_id
+                    AND armors.name IN (SELECT value FROM json_each(?))
+               WHERE characters.name IN (SELECT value FROM json_each(?))
+               GROUP BY characters.id''',
+            (json.dumps(list(pool)), json.dumps(list(characters)))).fetchall()
+        kept = {name: (power, items) for name, power, items in rows}
+        for name in characters:
+            if name not in kept:
+                raise EntityNotFound(name)
+        return kept
+
+    def plan(self, characters, armors=None, objective='total', max_items=MAX_ITEMS, **limits):
+        """Plan a loadout for ``characters`` from ``armors`` (default: every armor).
+
+        Armor outside the pool stays on and counts against ``max_items``.
+        ``limits`` are passed on to ``plan_loadout``; nothing is written.
+        """
+        pool = self._rows('armors', 'bonus', armors)
+        kept = self._kept(characters, [name for name, bonus in pool])
+        room = {name: max(0, _limit(max_items, name, MAX_ITEMS) - items)
+                for name, (power, items) in kept.items()}
+        return plan_loadout([(name, power) for name, (power, items) in kept.items()], pool,
+                            objective, max_items=room, **limits)
+
+    def apply(self, loadout):
+        """Replace each planned character's pool armor with its assignment in one transaction.
+
+        Links to armor outside ``loadout.pool`` stay. Returns the number of
+        links written.
+        """
+        characters = list(loadout.assignments)
+        armors = sorted({armor for names in loadout.assignments.values() for armor in names})
+        character_ids, armor_ids = EquipmentRepository(self.conn).resolve(characters, armors)
+        character_id = dict(zip(characters, character_ids))
+        armor_id = dict(zip(armors, armor_ids))
+        links = [(character_id[name], armor_id[armor])
+                 for name, names in loadout.assignments.items() for armor in names]
+        with self.conn:
+            self.conn.execute(
+                '''DELETE FROM character_armor
+                   WHERE character_id IN (SELECT value FROM json_each(?))
+                     AND armor_id IN (SELECT id FROM armors WHERE name IN (SELECT value FROM json_each(?)))''',
+                (json.dumps(character_ids), json.dumps(list(loadout.pool))))
+            self.conn.executemany("INSERT INTO character_armor (character_id, armor_id) VALUES (?, ?)",
+                                  links)
+        return len(links)
+
+    def optimize(self, characters, armors=None, objective='total', **limits):
+        """``plan`` then ``apply``; returns the applied ``Loadout``."""
+        loadout = self.plan(characters, armors, objective, **limits)
+        self.apply(loadout)
+        return loadout
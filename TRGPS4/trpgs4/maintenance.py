@@ -0,0 +1,49 @@
+"""Database upkeep.
+
+Opening a database upgrades it, and the version 5 upgrade already compacts
+``character_armor`` once. ``python -m trpgs4.maintenance compact`` repeats
+that on demand, e.g. after another tool wrote to the file with foreign
+keys off, and ``--vacuum`` also returns the freed pages to the file system.
+"""
+import argparse
+import json
+import sys
+
+from .db import PROFILES, connect
+from .schema import compact_links
+
+
+def compact(conn, vacuum=False):
+    """Purge orphaned and duplicate equip links; returns a report of what was reclaimed."""
+    with conn:
+        report = compact_links(conn)
+    if vacuum:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        before = conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.execute("VACUUM")
+        after = conn.execute("PRAGMA page_count").fetchone()[0]
+        report['bytes_reclaimed'] = (before - after) * page_size
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m trpgs4.maintenance', description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='database file (default: $TRPGS4_DB or rpg_characters.db)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), help='connection profile')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compacter = commands.add_parser('compact', help='remove orphaned and duplicate equip links')
+    compacter.add_argument('--vacuum', action='store_true', help='also shrink the database file')
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db, args.profile)
+    try:
+        if args.command == 'compact':
+            result = compact(conn, args.vacuum)
+    finally:
+        conn.close()
+    json.dump(result, sys.stdout)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Batch evaluation of every party against every monster group.
+
+Each matchup is decided like ``calculate_battle``: summed battle power plus
+the side's modifier. Battle powers are read once, in one query, and every
+party and group is reduced to its total before any matchup is evaluated.
+Parties are then split into chunks that a process pool evaluates against
+all groups. Each worker writes its chunk's rows to a file of its own and
+hands back only the path and the tallies; the parent concatenates the
+files in order, so no result rows are pickled between processes.
+
+Input is JSON naming the parties and groups::
+
+    {"parties": {"Red team": ["Aria", "Borin"], ...},
+     "groups": {"Goblin pack": ["Goblin", "Goblin", "Ogre"], ...}}
+
+    python -m trpgs4.matchups campaign.json results.csv --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .battle import CHARACTERS_WIN, DRAW, MONSTERS_WIN
+from .db import PROFILES
+from .repository import EntityNotFound
+from .roster import Roster
+from .transfer import FORMATS, guess_format
+
+CHUNK_PARTIES = 64
+COLUMNS = ('party', 'group', 'party_power', 'group_power', 'winner')
+
+MatchupStats = namedtuple('MatchupStats', 'matchups wins draws losses workers elapsed')
+
+# Set in every worker process by _init_worker
+_groups = ()
+_format = 'csv'
+_directory = None
+
+
+def _init_worker(groups, fmt, directory=None):
+    global _groups, _format, _directory
+    _groups = groups
+    _format = fmt
+    _directory = directory
+
+
+def _evaluate_chunk(index, parties):
+    """Write chunk ``index`` to its own file; returns the path and the tallies."""
+    path = os.path.join(_directory, f'{index}.part')
+    with open(path, 'w', newline='', encoding='utf-8') as out:
+        return (path, *_evaluate(parties, out))
+
+
+def _evaluate(parties, out):
+    """Write a chunk of ``(name, power)`` parties against every group to ``out``."""
+    writer = csv.writer(out) if _format == 'csv' else None
+    wins = draws = losses = 0
+    for party, party_power in parties:
+        for group, group_power in _groups:
+            if party_power > group_power:
+                winner = CHARACTERS_WIN
+                wins += 1
+            elif group_power > party_power:
+                winner = MONSTERS_WIN
+                losses += 1
+            else:
+                winner = DRAW
+                draws += 1
+            row = (party, group, party_power, group_power, winner)
+            if writer:
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(dict(zip(COLUMNS, row))) + '\n')
+    return wins, draws, losses
+
+
+def _concatenate(path, fp, *tallies):
+    # Append a worker's finished chunk to the output and pass its tallies on
+    with open(path, newline='', encoding='utf-8') as chunk:
+        shutil.copyfileobj(chunk, fp)
+    os.remove(path)
+    return tallies
+
+
+def totals(battle, parties, groups, char_modifier=0, monster_modifier=0):
+    """Reduce ``{name: [members]}`` parties and groups to ``[(name, power)]`` lists.
+
+    Reads every battle power involved in a single query; raises
+    ``EntityNotFound`` for a missing member.
+    """
+    characters = {name for members in parties.values() for name in members}
+    monsters = {name for members in groups.values() for name in members}
+    char_powers, monster_powers = battle.battle_powers(characters, monsters)
+    return ([(name, sum(char_powers[member] for member in members) + char_modifier)
+             for name, members in parties.items()],
+            [(name, sum(monster_powers[member] for member in members) + monster_modifier)
+             for name, members in groups.items()])
+
+
+def evaluate(party_powers, group_powers, fp, fmt='csv', workers=None,
+             chunk_parties=CHUNK_PARTIES):
+    """Write every party-group matchup to ``fp``; returns ``MatchupStats``.
+
+    ``workers`` processes share the work (default: one per CPU); with one
+    worker, or if no process pool can be started, everything runs here.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}")
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    chunks = [party_powers[i:i + chunk_parties] for i in range(0, len(party_powers), chunk_parties)]
+    if fmt == 'csv':
+        csv.writer(fp).writerow(COLUMNS)
+
+    wins = draws = losses = 0
+    pool = None
+    with tempfile.TemporaryDirectory(prefix='matchups-') as directory:
+        if workers > 1 and len(chunks) > 1:
+            try:
+                pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                           initargs=(group_powers, fmt, directory))
+                # Start the workers now, so a pool that cannot run fails before any output
+                pool.submit(int).result()
+            except (OSError, NotImplementedError, BrokenProcessPool):
+                if pool is not None:
+                    pool.shutdown()
+                pool = None
+        try:
+            if pool is None:
+                workers = 1
+                _init_worker(group_powers, fmt)
+                results = (_evaluate(chunk, fp) for chunk in chunks)
+            else:
+                results = (_concatenate(path, fp, *tallies)
+                           for path, *tallies in pool.map(_evaluate_chunk, range(len(chunks)), chunks))
+            for chunk_wins, chunk_draws, chunk_losses in results:
+                wins += chunk_wins
+                draws += chunk_draws
+                losses += chunk_losses
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    return MatchupStats(wins + draws + losses, wins, draws, losses, workers,
+                        time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m trpgs4.matchups',
+                                     description='Evaluate every party against every monster group.')
+    parser.add_argument('input', help='JSON file with "parties" and "groups" ("-" for stdin)')
+    parser.add_argument('output', help='results file ("-" for stdout)')
+    parser.add_argument('--db', help='database file (default: $TRPGS4_DB or rpg_characters.db)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), help='connection profile')
+    parser.add_argument('--format', choices=FORMATS, help='output format (default: from the file name)')
+    parser.add_argument('--char-modifier', type=int, default=0)
+    parser.add_argument('--monster-modifier', type=int, default=0)
+    parser.add_argument('--workers', type=int, help='processes (default: one per CPU; 1 runs in-process)')
+    parser.add_argument('--chunk-parties', type=int, default=CHUNK_PARTIES,
+                        help='parties per unit of work')
+    args = parser.parse_args(argv)
+
+    with (sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')) as fp:
+        campaign = json.load(fp)
+    roster = Roster.open(args.db, args.profile)
+    try:
+        party_powers, group_powers = totals(roster.battle, campaign['parties'], campaign['groups'],
+                                            args.char_modifier, args.monster_modifier)
+    except EntityNotFound as error:
+        print(json.dumps({'error': f"{error.args[0]} does not exist"}), file=sys.stderr)
+        return 1
+    finally:
+        roster.close()
+
+    fmt = args.format or guess_format(args.output)
+    if args.output == '-':
+        stats = evaluate(party_powers, group_powers, sys.stdout, fmt, args.workers, args.chunk_parties)
+    else:
+        with open(args.output, 'w', newline='', encoding='utf-8') as fp:
+            stats = evaluate(party_powers, group_powers, fp, fmt, args.workers, args.chunk_parties)
+    stats = stats._replace(elapsed=round(stats.elapsed, 3))
+    print(json.dumps(stats._asdict()), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Leaderboards and battle power range queries.
+
+``characters.battle_power`` and ``monsters.battle_power`` are indexed
+(schema version 7), so a top-N list reads N index entries from the high end
+and a range lookup seeks to its lower bound; neither touches the rest of the
+table, however large it is.
+"""
+from collections import namedtuple
+
+from .repository import EntityNotFound
+from .schema import POWER_TABLES
+
+TOP_N = 20
+RANGE_LIMIT = 1000
+NEAR_PERCENT = 10
+
+Ranked = namedtuple('Ranked', 'id name battle_power')
+
+
+def _check(table):
+    if table not in POWER_TABLES:
+        raise ValueError(f"unknown table: {table!r}")
+
+
+class RankingService:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def top(self, table, n=TOP_N):
+        """The ``n`` strongest rows of ``table``, strongest first."""
+        _check(table)
+        return [Ranked(*row) for row in self.conn.execute(
+            f'''SELECT id, name, battle_power FROM {table}
+                ORDER BY battle_power DESC LIMIT ?''', (n,))]
+
+    def between(self, table, low, high, limit=RANGE_LIMIT):
+        """Rows of ``table`` with ``low <= battle_power <= high``, strongest first.
+
+        At most ``limit`` rows are returned.
+        """
+        _check(table)
+        return [Ranked(*row) for row in self.conn.execute(
+            f'''SELECT id, name, battle_power FROM {table}
+                WHERE battle_power BETWEEN ? AND ?
+                ORDER BY battle_power DESC LIMIT ?''', (low, high, limit))]
+
+    def near(self, table, power, percent=NEAR_PERCENT, limit=RANGE_LIMIT):
+        """Rows of ``table`` whose battle power is within ``percent`` % of ``power``."""
+        spread = abs(power) * percent / 100
+        return self.between(table, power - spread, power + spread, limit)
+
+    def near_entity(self, table, of_table, name, percent=NEAR_PERCENT, limit=RANGE_LIMIT):
+        """Rows of ``table`` within ``percent`` % of the battle power of ``name`` in ``of_table``.
+
+        E.g. ``near_entity('characters', 'monsters', 'Ogre')`` finds the
+        characters that are a fair match for the ogre. Raises
+        ``EntityNotFound`` if there is no such row.
+        """
+        _check(of_table)
+        row = self.conn.execute(f"SELECT battle_power FROM {of_table} WHERE name=?", (name,)).fetchone()
+        if row is None:
+            raise EntityNotFound(name)
+        return self.near(table, row[0], percent, limit)
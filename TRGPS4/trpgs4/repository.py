@@ -0,0 +1,302 @@
+"""Data access for characters, armors, equip links and monsters.
+
+Every repository wraps an open ``sqlite3.Connection``; nothing here touches
+the GUI or opens a database on its own.
+"""
+import itertools
+import json
+import re
+import sqlite3
+from collections import namedtuple
+
+from .schema import has_fts
+
+SEARCH_LIMIT = 200
+SEARCH_CANDIDATES = 5000
+PAGE_SIZE = 100
+
+Character = namedtuple('Character', 'id name description level battle_power')
+Armor = namedtuple('Armor', 'id name description bonus')
+Monster = namedtuple('Monster', 'id name description battle_power')
+
+
+class EntityNotFound(LookupError):
+    """Raised when a lookup by name matches no row."""
+
+
+class DuplicateNameError(ValueError):
+    """Raised when adding a row whose name is already taken in its table."""
+
+
+def fts_query(query):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    return ' '.join(f'"{token}"*' for token in re.findall(r'\w+', query))
+
+
+def _insert(conn, sql, params):
+    try:
+        with conn:
+            return conn.execute(sql, params).lastrowid
+    except sqlite3.IntegrityError as e:
+        raise DuplicateNameError(params[0]) from e
+
+
+class _NamedRepository:
+    """Shared behaviour of the characters, armors and monsters tables."""
+
+    table = None
+    record = None
+    columns = ()
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._fts = None
+
+    def get_by_id(self, row_id):
+        row = self.conn.execute(
+            f"SELECT {', '.join(self.record._fields)} FROM {self.table} WHERE id=?",
+            (row_id,)).fetchone()
+        return self.record(*row) if row else None
+
+    def delete_by_id(self, row_id):
+        with self.conn:
+            self._delete("id", row_id)
+
+    def delete(self, name):
+        with self.conn:
+            self._delete("name", name)
+
+    def remove(self, name):
+        """Like ``delete`` but leaves committing to the caller; returns whether a row went."""
+        return self._delete("name", name) > 0
+
+    def _delete(self, column, value):
+        # Equip links go with the row through ON DELETE CASCADE
+        return self.conn.execute(f"DELETE FROM {self.table} WHERE {column}=?", (value,)).rowcount
+
+    def update_by_id(self, row_id, **values):
+        """Set editable ``columns`` of row ``row_id``."""
+        with self.conn:
+            self.set_fields(row_id, values)
+
+    def insert(self, values):
+        """Add a row from ``{column: value}``, leaving committing to the caller's transaction."""
+        for column in values:
+            if column not in self.columns:
+                raise ValueError(f"{self.table}.{column} is not editable")
+        try:
+            return self.conn.execute(
+                f"INSERT INTO {self.table} ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                tuple(values.values())).lastrowid
+        except sqlite3.IntegrityError as e:
+            raise DuplicateNameError(values.get('name')) from e
+
+    def set_fields(self, row_id, values):
+        """Like ``update_by_id`` but leaves committing to the caller's transaction."""
+        for column in values:
+            if column not in self.columns:
+                raise ValueError(f"{self.table}.{column} is not editable")
+        if not values:
+            return
+        assignments = ', '.join(f"{column}=?" for column in values)
+        try:
+            self.conn.execute(f"UPDATE {self.table} SET {assignments} WHERE id=?",
+                              (*values.values(), row_id))
+        except sqlite3.IntegrityError as e:
+            raise DuplicateNameError(values.get('name')) from e
+
+    def page(self, after_id=0, limit=PAGE_SIZE):
+        """Up to ``limit`` ``(id, name)`` rows with ids above ``after_id``, in id order."""
+        return self.conn.execute(
+            f"SELECT id, name FROM {self.table} WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)).fetchall()
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """``(id, name)`` rows matching every word of ``query`` as a prefix, best first.
+
+        A query without any word characters matches nothing. Name hits come
+        before description-only hits; each group is capped at
+        ``SEARCH_CANDIDATES`` hits in rowid order before ranking, so a
+        common prefix can miss some description hits but never crowds out
+        the names. Falls back to a substring scan of names when the
+        database has no full-text index.
+        """
+        if self._fts is None:
+            self._fts = has_fts(self.conn, self.table)
+        match = fts_query(query)
+        if not match:
+            return []
+        if self._fts:
+            # Only the first SEARCH_CANDIDATES hits per group are scored, so a
+            # one-letter prefix matching most of the table costs the same as a rare word.
+            fts = f'{self.table}_fts'
+            names = f'name : ({match})'
+            cur = self.conn.execute(
+                f'''SELECT {self.table}.id, {self.table}.name FROM (
+                        SELECT * FROM (SELECT rowid, 0 AS tier, bm25({fts}, 10.0, 1.0) AS score
+                                       FROM {fts} WHERE {fts} MATCH ? LIMIT ?)
+                        UNION ALL
+                        SELECT * FROM (SELECT rowid, 1 AS tier, bm25({fts}, 10.0, 1.0) AS score
+                                       FROM {fts} WHERE {fts} MATCH ? LIMIT ?)) AS hits
+                    JOIN {self.table} ON {self.table}.id = hits.rowid
+                    ORDER BY hits.tier, hits.score LIMIT ?''',
+                (names, SEARCH_CANDIDATES, f'({match}) NOT {names}', SEARCH_CANDIDATES, limit))
+        else:
+            cur = self.conn.execute(
+                f"SELECT id, name FROM {self.table} WHERE LOWER(name) LIKE ? LIMIT ?",
+                (f'%{query.strip().lower()}%', limit))
+        return cur.fetchall()
+
+
+class CharacterRepository(_NamedRepository):
+    table = 'characters'
+    record = Character
+    columns = ('name', 'description', 'level')
+
+    def add(self, name, description, level=1):
+        return _insert(self.conn,
+                       "INSERT INTO characters (name, description, level) VALUES (?, ?, ?)",
+                       (name, description, level))
+
+    def get(self, name):
+        row = self.conn.execute(
+            "SELECT id, name, description, level, battle_power FROM characters WHERE name=?",
+            (name,)).fetchone()
+        return Character(*row) if row else None
+
+    def names(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM characters")]
+
+    def set_level(self, name, level):
+        with self.conn:
+            self.conn.execute("UPDATE characters SET level=? WHERE name=?", (int(level), name))
+
+    def equipment(self, name):
+        """Return ``(armor name, bonus)`` pairs equipped by character ``name``."""
+        return self.conn.execute(
+            '''SELECT armors.name, armors.bonus FROM armors
+               JOIN character_armor ON armors.id = character_armor.armor_id
+               JOIN characters ON characters.id = character_armor.character_id
+               WHERE characters.name=?''', (name,)).fetchall()
+
+    def equipment_by_id(self, character_id):
+        """Return ``(armor id, name, bonus)`` rows equipped by character ``character_id``."""
+        return self.conn.execute(
+            '''SELECT armors.id, armors.name, armors.bonus FROM character_armor
+               JOIN armors ON armors.id = character_armor.armor_id
+               WHERE character_armor.character_id=?''', (character_id,)).fetchall()
+
+    def detail(self, character_id):
+        """``(character, equipment_by_id(...))``, or None if the row is gone."""
+        character = self.get_by_id(character_id)
+        return (character, self.equipment_by_id(character_id)) if character else None
+
+
+class ArmorRepository(_NamedRepository):
+    table = 'armors'
+    record = Armor
+    columns = ('name', 'description', 'bonus')
+
+    def add(self, name, description, bonus=0):
+        return _insert(self.conn,
+                       "INSERT INTO armors (name, description, bonus) VALUES (?, ?, ?)",
+                       (name, description, bonus))
+
+    def get(self, name):
+        row = self.conn.execute(
+            "SELECT id, name, description, bonus FROM armors WHERE name=?",
+            (name,)).fetchone()
+        return Armor(*row) if row else None
+
+    def names(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM armors")]
+
+    def set_bonus(self, name, bonus):
+        with self.conn:
+            self.conn.execute("UPDATE armors SET bonus=? WHERE name=?", (int(bonus), name))
+
+
+class EquipmentRepository:
+    """The ``character_armor`` link table."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def resolve(self, characters, armors):
+        """Map character and armor names to ids with a single query.
+
+        Returns ``(character_ids, armor_ids)`` in input order, raising
+        ``EntityNotFound`` for the first name that does not exist.
+        """
+        found = {'characters': {}, 'armors': {}}
+        cur = self.conn.execute(
+            '''SELECT 'characters', name, id FROM characters
+               WHERE name IN (SELECT value FROM json_each(?))
+               UNION ALL
+               SELECT 'armors', name, id FROM armors
+               WHERE name IN (SELECT value FROM json_each(?))''',
+            (json.dumps(list(characters)), json.dumps(list(armors))))
+        for table, name, row_id in cur:
+            found[table][name] = row_id
+        for table, names in (('characters', characters), ('armors', armors)):
+            for name in names:
+                if name not in found[table]:
+                    raise EntityNotFound(name)
+        return ([found['characters'][name] for name in characters],
+                [found['armors'][name] for name in armors])
+
+    def equip(self, characters, armors):
+        """Equip every armor in ``armors`` on every character in ``characters``.
+
+        All links are written in one transaction; returns the number created,
+        which leaves out pairs that were already equipped.
+        """
+        with self.conn:
+            return self.link(characters, armors)
+
+    def link(self, characters, armors):
+        """Like ``equip`` but leaves committing to the caller's transaction."""
+        character_ids, armor_ids = self.resolve(characters, armors)
+        return self.conn.executemany(
+            "INSERT OR IGNORE INTO character_armor (character_id, armor_id) VALUES (?, ?)",
+            itertools.product(character_ids, armor_ids)).rowcount
+
+    def unequip(self, characters, armors):
+        """Remove every armor in ``armors`` from every character in ``characters``.
+
+        All links are removed in one transaction; returns the number deleted.
+        """
+        with self.conn:
+            return self.unlink(characters, armors)
+
+    def unlink(self, characters, armors):
+        """Like ``unequip`` but leaves committing to the caller's transaction."""
+        character_ids, armor_ids = self.resolve(characters, armors)
+        return self.conn.executemany(
+            "DELETE FROM character_armor WHERE character_id=? AND armor_id=?",
+            itertools.product(character_ids, armor_ids)).rowcount
+
+
+class MonsterRepository(_NamedRepository):
+    table = 'monsters'
+    record = Monster
+    columns = ('name', 'description', 'battle_power')
+
+    def add(self, name, description, battle_power=1):
+        return _insert(self.conn,
+                       "INSERT INTO monsters (name, description, battle_power) VALUES (?, ?, ?)",
+                       (name, description, battle_power))
+
+    def get(self, name):
+        row = self.conn.execute(
+            "SELECT id, name, description, battle_power FROM monsters WHERE name=?",
+            (name,)).fetchone()
+        return Monster(*row) if row else None
+
+    def names(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM monsters")]
+
+    def set_battle_power(self, name, battle_power):
+        with self.conn:
+            self.conn.execute("UPDATE monsters SET battle_power=? WHERE name=?",
+                              (int(battle_power), name))
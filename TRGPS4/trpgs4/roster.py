@@ -0,0 +1,31 @@
+"""One object bundling every repository over a single connection."""
+from .battle import BattleService
+from .combat import CombatService
+from .db import connect
+from .encounter import EncounterService
+from .loadout import LoadoutService
+from .ranking import RankingService
+from .repository import (ArmorRepository, CharacterRepository, EquipmentRepository,
+                         MonsterRepository)
+
+
+class Roster:
+    def __init__(self, conn):
+        self.conn = conn
+        self.characters = CharacterRepository(conn)
+        self.armors = ArmorRepository(conn)
+        self.equipment = EquipmentRepository(conn)
+        self.monsters = MonsterRepository(conn)
+        self.battle = BattleService(conn)
+        self.combat = CombatService(conn)
+        self.encounters = EncounterService(conn)
+        self.loadouts = LoadoutService(conn)
+        self.rankings = RankingService(conn)
+
+    @classmethod
+    def open(cls, path=None, profile=None, instrumentation=None):
+        """Connect to ``path`` with ``profile``, creating the schema if needed."""
+        return cls(connect(path, profile, instrumentation))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,365 @@
+"""Table definitions and versioned migrations for the Tabletop RPG Manager database.
+
+The schema version lives in ``PRAGMA user_version``.  ``MIGRATIONS[n]`` takes a
+database from version ``n`` to ``n + 1``; each one runs in its own transaction
+so an interrupted upgrade leaves the file at the last completed version.
+"""
+import logging
+import sqlite3
+
+log = logging.getLogger(__name__)
+
+TABLES = (
+    # Character Table
+    '''CREATE TABLE IF NOT EXISTS characters (
+       id INTEGER PRIMARY KEY AUTOINCREMENT,
+       name TEXT NOT NULL,
+       description TEXT NOT NULL,
+       level INTEGER DEFAULT 1)''',
+
+    # Armor Table
+    '''CREATE TABLE IF NOT EXISTS armors (
+       id INTEGER PRIMARY KEY AUTOINCREMENT,
+       name TEXT NOT NULL,
+       description TEXT NOT NULL,
+       bonus INTEGER DEFAULT 0)''',
+
+    # Character_Armor Joint Table
+    '''CREATE TABLE IF NOT EXISTS character_armor (
+       character_id INTEGER,
+       armor_id INTEGER,
+       FOREIGN KEY(character_id) REFERENCES characters(id),
+       FOREIGN KEY(armor_id) REFERENCES armors(id))''',
+
+    # Monster Table
+    '''CREATE TABLE IF NOT EXISTS monsters (
+       id INTEGER PRIMARY KEY AUTOINCREMENT,
+       name TEXT NOT NULL,
+       description TEXT NOT NULL,
+       battle_power INTEGER DEFAULT 1)''',
+)
+
+NAMED_TABLES = ('characters', 'armors', 'monsters')
+
+
+def _create_tables(conn):
+    for statement in TABLES:
+        conn.execute(statement)
+
+
+def _rename_duplicates(conn, table):
+    # Older databases allowed repeated names; keep the oldest row's name and
+    # give the others "name #id", or "name #id.n" if that is taken too, so
+    # the unique index can be built.
+    duplicates = conn.execute(
+        f'''SELECT id, name FROM {table}
+            WHERE name IN (SELECT name FROM {table} GROUP BY name HAVING COUNT(*) > 1)
+              AND id NOT IN (SELECT MIN(id) FROM {table} GROUP BY name)
+            ORDER BY id''').fetchall()
+    for row_id, name in duplicates:
+        new_name, n = f"{name} #{row_id}", 1
+        while conn.execute(f"SELECT 1 FROM {table} WHERE name=?", (new_name,)).fetchone():
+            n += 1
+            new_name = f"{name} #{row_id}.{n}"
+        conn.execute(f"UPDATE {table} SET name=? WHERE id=?", (new_name, row_id))
+        log.warning("renamed duplicate %s %r (id %d) to %r", table, name, row_id, new_name)
+
+
+def _add_indexes(conn):
+    for table in NAMED_TABLES:
+        _rename_duplicates(conn, table)
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_name ON {table}(name)")
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_character_armor_character
+                    ON character_armor(character_id, armor_id)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_character_armor_armor
+                    ON character_armor(armor_id, character_id)''')
+
+
+# characters.battle_power is level plus the bonus of every equipped armor.
+# These triggers keep it current for every write path, so readers never
+# aggregate; links to deleted armors count as zero, matching the inner join.
+BATTLE_POWER_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS characters_battle_power_insert
+       AFTER INSERT ON characters
+       BEGIN
+           UPDATE characters SET battle_power = NEW.level WHERE id = NEW.id;
+       END''',
+
+    '''CREATE TRIGGER IF NOT EXISTS characters_battle_power_level
+       AFTER UPDATE OF level ON characters
+       BEGIN
+           UPDATE characters SET battle_power = battle_power + NEW.level - OLD.level
+           WHERE id = NEW.id;
+       END''',
+
+    '''CREATE TRIGGER IF NOT EXISTS character_armor_battle_power_insert
+       AFTER INSERT ON character_armor
+       BEGIN
+           UPDATE characters
+           SET battle_power = battle_power + COALESCE((SELECT bonus FROM armors WHERE id = NEW.armor_id), 0)
+           WHERE id = NEW.character_id;
+       END''',
+
+    '''CREATE TRIGGER IF NOT EXISTS character_armor_battle_power_delete
+       AFTER DELETE ON character_armor
+       BEGIN
+           UPDATE characters
+           SET battle_power = battle_power - COALESCE((SELECT bonus FROM armors WHERE id = OLD.armor_id), 0)
+           WHERE id = OLD.character_id;
+       END''',
+
+    '''CREATE TRIGGER IF NOT EXISTS character_armor_battle_power_update
+       AFTER UPDATE ON character_armor
+       BEGIN
+           UPDATE characters
+           SET battle_power = battle_power - COALESCE((SELECT bonus FROM armors WHERE id = OLD.armor_id), 0)
+           WHERE id = OLD.character_id;
+           UPDATE characters
+           SET battle_power = battle_power + COALESCE((SELECT bonus FROM armors WHERE id = NEW.armor_id), 0)
+           WHERE id = NEW.character_id;
+       END''',
+
+    '''CREATE TRIGGER IF NOT EXISTS armors_battle_power_bonus
+       AFTER UPDATE OF bonus ON armors
+       BEGIN
+           UPDATE characters
+           SET battle_power = battle_power + (NEW.bonus - OLD.bonus) *
+               (SELECT COUNT(*) FROM character_armor
+                WHERE armor_id = NEW.id AND character_id = characters.id)
+           WHERE id IN (SELECT character_id FROM character_armor WHERE armor_id = NEW.id);
+       END''',
+
+    '''CREATE TRIGGER IF NOT EXISTS armors_battle_power_delete
+       AFTER DELETE ON armors
+       BEGIN
+           UPDATE characters
+           SET battle_power = battle_power - OLD.bonus *
+               (SELECT COUNT(*) FROM character_armor
+                WHERE armor_id = OLD.id AND character_id = characters.id)
+           WHERE id IN (SELECT character_id FROM character_armor WHERE armor_id = OLD.id);
+       END''',
+)
+
+
+def recompute_battle_power(conn):
+    """Rebuild ``characters.battle_power`` from scratch."""
+    conn.execute('''UPDATE characters SET battle_power = level + COALESCE(
+                        (SELECT SUM(armors.bonus) FROM character_armor
+                         JOIN armors ON armors.id = character_armor.armor_id
+                         WHERE character_armor.character_id = characters.id), 0)''')
+
+
+def _materialize_battle_power(conn):
+    conn.execute("ALTER TABLE characters ADD COLUMN battle_power INTEGER NOT NULL DEFAULT 0")
+    recompute_battle_power(conn)
+    for statement in BATTLE_POWER_TRIGGERS:
+        conn.execute(statement)
+
+
+def _fts_statements(table):
+    # External-content FTS5 index over name and description, kept in sync by
+    # triggers. Only name/description updates touch it, not level or power.
+    fts = f'{table}_fts'
+    return (
+        f'''CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            name, description, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')''',
+
+        f'''CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts}(rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+            END''',
+
+        f'''CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts}({fts}, rowid, name, description)
+                VALUES ('delete', OLD.id, OLD.name, OLD.description);
+            END''',
+
+        f'''CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF name, description ON {table}
+            BEGIN
+                INSERT INTO {fts}({fts}, rowid, name, description)
+                VALUES ('delete', OLD.id, OLD.name, OLD.description);
+                INSERT INTO {fts}(rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+            END''',
+
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+
+
+def fts_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def _add_search_index(conn):
+    # SQLite builds without FTS5 keep working; searches fall back to LIKE.
+    if not fts_available(conn):
+        return
+    for table in NAMED_TABLES:
+        for statement in _fts_statements(table):
+            conn.execute(statement)
+
+
+def has_fts(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                        (f'{table}_fts',)).fetchone() is not None
+
+
+# Version 5 rebuilds character_armor with one row per pair and cascading
+# deletes. The armor-delete trigger now runs BEFORE the delete, while the
+# links it counts still exist; the cascade then removes them, and their own
+# delete trigger finds the armor gone and subtracts nothing more.
+LINK_TABLE = '''CREATE TABLE character_armor (
+       character_id INTEGER NOT NULL REFERENCES characters(id) ON DELETE CASCADE,
+       armor_id INTEGER NOT NULL REFERENCES armors(id) ON DELETE CASCADE,
+       PRIMARY KEY (character_id, armor_id)) WITHOUT ROWID'''
+
+ARMOR_DELETE_TRIGGER = '''CREATE TRIGGER IF NOT EXISTS armors_battle_power_delete
+       BEFORE DELETE ON armors
+       BEGIN
+           UPDATE characters
+           SET battle_power = battle_power - OLD.bonus
+           WHERE id IN (SELECT character_id FROM character_armor WHERE armor_id = OLD.id);
+       END'''
+
+
+def _has_link_key(conn):
+    return conn.execute(
+        "SELECT 1 FROM pragma_table_info('character_armor') WHERE pk > 0").fetchone() is not None
+
+
+def compact_links(conn):
+    """Delete orphaned and duplicate ``character_armor`` rows and fix battle power.
+
+    Returns ``{'orphans': ..., 'duplicates': ..., 'links': ...}``: the rows
+    removed of each kind and the links left. Leaves committing to the caller.
+    """
+    orphans = conn.execute('''DELETE FROM character_armor
+                              WHERE character_id NOT IN (SELECT id FROM characters)
+                                 OR armor_id NOT IN (SELECT id FROM armors)''').rowcount
+    duplicates = 0
+    if not _has_link_key(conn):
+        duplicates = conn.execute('''DELETE FROM character_armor WHERE rowid NOT IN
+                                      (SELECT MIN(rowid) FROM character_armor
+                                       GROUP BY character_id, armor_id)''').rowcount
+    recompute_battle_power(conn)
+    links = conn.execute("SELECT COUNT(*) FROM character_armor").fetchone()[0]
+    return {'orphans': orphans, 'duplicates': duplicates, 'links': links}
+
+
+def _enforce_link_integrity(conn):
+    report = compact_links(conn)
+    if report['orphans'] or report['duplicates']:
+        log.warning("removed %d orphaned and %d duplicate equipment links; %d remain",
+                    report['orphans'], report['duplicates'], report['links'])
+    # Renaming checks every trigger, so drop the armors triggers that read the table first
+    conn.execute("DROP TRIGGER IF EXISTS armors_battle_power_bonus")
+    conn.execute("DROP TRIGGER IF EXISTS armors_battle_power_delete")
+    conn.execute("ALTER TABLE character_armor RENAME TO character_armor_old")
+    conn.execute(LINK_TABLE)
+    conn.execute('''INSERT INTO character_armor (character_id, armor_id)
+                    SELECT character_id, armor_id FROM character_armor_old''')
+    conn.execute("DROP TABLE character_armor_old")
+    # The primary key serves lookups by character; keep the index for lookups by armor
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_character_armor_armor
+                    ON character_armor(armor_id, character_id)''')
+    for statement in BATTLE_POWER_TRIGGERS:
+        if 'armors_battle_power_delete' not in statement:
+            conn.execute(statement)
+    conn.execute(ARMOR_DELETE_TRIGGER)
+
+
+# Version 6 logs every insert, update and delete of a named table, so views
+# can catch up by reading the rows changed since the last sequence number
+# they saw (see changes.py). Battle power updates are logged like any other,
+# which covers equipping and armor bonus changes. Only the newest
+# CHANGE_LOG_KEEP entries are kept; a reader that falls further behind
+# reloads instead.
+CHANGE_LOG_KEEP = 10000
+
+CHANGE_LOG = '''CREATE TABLE IF NOT EXISTS change_log (
+       seq INTEGER PRIMARY KEY AUTOINCREMENT,
+       table_name TEXT NOT NULL,
+       row_id INTEGER NOT NULL)'''
+
+
+# The columns views show; an update that leaves them all as they were is not logged
+CHANGE_COLUMNS = {
+    'characters': ('name', 'description', 'level', 'battle_power'),
+    'armors': ('name', 'description', 'bonus'),
+    'monsters': ('name', 'description', 'battle_power'),
+}
+
+
+def _change_log_triggers(table):
+    log_change = "INSERT INTO change_log (table_name, row_id) VALUES ('{table}', {row}.id);"
+    changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in CHANGE_COLUMNS[table])
+    return tuple(
+        f'''CREATE TRIGGER IF NOT EXISTS {table}_change_{event.lower()} AFTER {event} ON {table}
+            {when}
+            BEGIN
+                {log_change.format(table=table, row=row)}
+            END'''
+        for event, row, when in (('INSERT', 'NEW', ''), ('UPDATE', 'NEW', f'WHEN {changed}'),
+                                 ('DELETE', 'OLD', '')))
+
+
+def _add_change_log(conn):
+    conn.execute(CHANGE_LOG)
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS change_log_prune AFTER INSERT ON change_log
+                     BEGIN
+                         DELETE FROM change_log WHERE seq <= NEW.seq - {CHANGE_LOG_KEEP};
+                     END''')
+    for table in NAMED_TABLES:
+        for statement in _change_log_triggers(table):
+            conn.execute(statement)
+
+
+# Version 7 indexes battle power, so rankings and range lookups (ranking.py)
+# walk an index instead of sorting or scanning the table.
+POWER_TABLES = ('characters', 'monsters')
+
+
+def _index_battle_power(conn):
+    for table in POWER_TABLES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_battle_power ON {table}(battle_power)")
+
+
+MIGRATIONS = (
+    _create_tables,
+    _add_indexes,
+    _materialize_battle_power,
+    _add_search_index,
+    _enforce_link_integrity,
+    _add_change_log,
+    _index_battle_power,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Bring ``conn`` up to ``SCHEMA_VERSION`` and return the version it started at."""
+    start = schema_version(conn)
+    if start > SCHEMA_VERSION:
+        raise RuntimeError(f"database schema version {start} is newer than this "
+                           f"program supports ({SCHEMA_VERSION})")
+    for version in range(start, SCHEMA_VERSION):
+        conn.execute("BEGIN")
+        try:
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return start
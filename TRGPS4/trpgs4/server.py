@@ -0,0 +1,362 @@
+"""A small HTTP/JSON API over the roster, built on asyncio streams.
+
+No framework and no external services: requests are parsed here and every
+database call runs on a ``DatabaseWorker``, so SQLite work happens on its
+writer thread and a bounded set of reader threads, one connection each,
+while the event loop only moves bytes. Connections are kept alive, and a
+listing without ``limit`` is streamed page by page with chunked encoding,
+so memory stays flat however large the table is.
+
+    python -m trpgs4.server --port 8080
+
+Routes, where ``{table}`` is characters, armors or monsters::
+
+    GET    /{table}?after=0&limit=100   (id, name) rows in id order
+    GET    /{table}?q=text              search, best matches first
+    GET    /{table}/{id}                one record; characters include equipment
+    POST   /{table}                     add {"name", "description", ...}; returns {"id"}
+    PATCH  /{table}/{id}                change editable fields; returns the record
+    DELETE /{table}/{id}
+    POST   /equip, /unequip             {"characters": [names], "armors": [names]}
+    POST   /battle-power                {"characters": [names], "monsters": [names]}
+    POST   /battle                      the same plus "char_modifier", "monster_modifier"
+
+Errors come back as ``{"error": message}`` with a 4xx status, or 500 for a bug.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from .db import PROFILES
+from .repository import SEARCH_LIMIT, DuplicateNameError, EntityNotFound
+from .worker import DEFAULT_READERS, DatabaseWorker
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+# Rows per worker call when streaming a whole table
+STREAM_PAGE = 1000
+MAX_BODY = 1 << 20
+# What SQLite can store in an INTEGER column or bind as a parameter
+SQLITE_INTEGER = range(-(1 << 63), 1 << 63)
+
+TABLES = ('characters', 'armors', 'monsters')
+# The integer column each table's add() takes after name and description
+INTEGER_FIELD = {'characters': 'level', 'armors': 'bonus', 'monsters': 'battle_power'}
+
+REASONS = {
+    200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+    431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Calls run on the worker, each given its thread's Roster
+
+def _record(roster, table, row_id):
+    if table == 'characters':
+        detail = roster.characters.detail(row_id)
+        if detail is None:
+            return None
+        character, equipment = detail
+        return {**character._asdict(),
+                'equipment': [{'id': armor_id, 'name': name, 'bonus': bonus}
+                              for armor_id, name, bonus in equipment]}
+    record = getattr(roster, table).get_by_id(row_id)
+    return record and record._asdict()
+
+
+def _update(roster, table, row_id, values):
+    getattr(roster, table).update_by_id(row_id, **values)
+    return _record(roster, table, row_id)
+
+
+def _delete(roster, table, row_id):
+    repository = getattr(roster, table)
+    if repository.get_by_id(row_id) is None:
+        return False
+    repository.delete_by_id(row_id)
+    return True
+
+
+def _rows(rows):
+    return [{'id': row_id, 'name': name} for row_id, name in rows]
+
+
+def _fields(table, body, partial=False):
+    """Check a request body against ``table``'s editable columns."""
+    if not isinstance(body, dict):
+        raise HTTPError(400, "expected a JSON object")
+    integer = INTEGER_FIELD[table]
+    for column, value in body.items():
+        if column not in ('name', 'description', integer):
+            raise HTTPError(400, f"{table}.{column} is not editable")
+        expected = int if column == integer else str
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise HTTPError(400, f"{column} must be {'an integer' if expected is int else 'a string'}")
+        if expected is int and value not in SQLITE_INTEGER:
+            raise HTTPError(400, f"{column} is out of range")
+    if partial and not body:
+        raise HTTPError(400, "no fields to change")
+    for column in ('name', 'description'):
+        # A PATCH may leave them out, but not blank them
+        if (column in body or not partial) and not body.get(column, '').strip():
+            raise HTTPError(400, f"{column} is required")
+    return body
+
+
+def _names(body, *sides):
+    if not isinstance(body, dict):
+        raise HTTPError(400, "expected a JSON object")
+    lists = []
+    for side in sides:
+        names = body.get(side, [])
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise HTTPError(400, f"{side} must be a list of names")
+        lists.append(names)
+    return lists
+
+
+def _int(value, what, minimum=None):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{what} must be an integer") from None
+    if number not in SQLITE_INTEGER:
+        raise HTTPError(400, f"{what} is out of range")
+    if minimum is not None and number < minimum:
+        raise HTTPError(400, f"{what} must be at least {minimum}")
+    return number
+
+
+class Server:
+    """Serves the API for one ``DatabaseWorker``."""
+
+    def __init__(self, worker, stream_page=STREAM_PAGE):
+        self.worker = worker
+        self.stream_page = stream_page
+
+    def read(self, fn, *args):
+        return asyncio.wrap_future(self.worker.submit(fn, *args))
+
+    def write(self, fn, *args):
+        return asyncio.wrap_future(self.worker.submit(fn, *args, write=True))
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until the client is done with it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, 431, {'error': 'request head too large'}, False)
+                    return
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                try:
+                    method, target, version = request_line.split(' ', 2)
+                except ValueError:
+                    await self.send(writer, 400, {'error': 'malformed request line'}, False)
+                    return
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+
+                length = headers.get('content-length', '0')
+                if not length.isdigit():
+                    await self.send(writer, 400, {'error': 'bad Content-Length'}, False)
+                    return
+                length = int(length)
+                if length > MAX_BODY:
+                    await self.send(writer, 413, {'error': 'request body too large'}, False)
+                    return
+                body = await reader.readexactly(length) if length else b''
+                await self.respond(writer, method, target, body, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, target, body, keep_alive):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if body:
+                try:
+                    body = json.loads(body)
+                except ValueError:
+                    raise HTTPError(400, "request body is not valid JSON") from None
+            else:
+                body = {}
+            result = await self.dispatch(writer, method, url.path, query, body, keep_alive)
+            if result is None:
+                return  # streamed
+            status, payload = result
+        except HTTPError as error:
+            status, payload = error.status, {'error': str(error)}
+        except EntityNotFound as error:
+            status, payload = 404, {'error': f"{error.args[0]} does not exist"}
+        except DuplicateNameError as error:
+            status, payload = 409, {'error': f"{error.args[0]} already exists"}
+        except ValueError as error:
+            status, payload = 400, {'error': str(error)}
+        except ConnectionError:
+            raise
+        except Exception as error:
+            log.exception("%s %s failed", method, target)
+            status, payload = 500, {'error': f"{type(error).__name__}: {error}"}
+        await self.send(writer, status, payload, keep_alive)
+
+    async def send(self, writer, status, payload, keep_alive):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def dispatch(self, writer, method, path, query, body, keep_alive):
+        """Route one request; returns ``(status, payload)``, or None once streamed."""
+        parts = path.strip('/').split('/')
+        if parts[0] in TABLES and len(parts) == 1:
+            table = parts[0]
+            if method == 'GET':
+                if 'q' in query:
+                    limit = _int(query.get('limit', SEARCH_LIMIT), 'limit', minimum=1)
+                    q = query['q']
+                    return 200, _rows(await self.read(
+                        lambda roster: getattr(roster, table).search(q, limit)))
+                after = _int(query.get('after', 0), 'after')
+                if 'limit' in query:
+                    limit = _int(query['limit'], 'limit', minimum=1)
+                    return 200, _rows(await self.read(
+                        lambda roster: getattr(roster, table).page(after, limit)))
+                await self.stream(writer, table, after, keep_alive)
+                return None
+            if method == 'POST':
+                fields = _fields(table, body)
+                row_id = await self.write(lambda roster: getattr(roster, table).add(**fields))
+                return 201, {'id': row_id}
+            raise HTTPError(405, f"{method} not allowed on /{table}")
+
+        if parts[0] in TABLES and len(parts) == 2:
+            table, row_id = parts[0], _int(parts[1], 'id')
+            if method == 'GET':
+                record = await self.read(_record, table, row_id)
+            elif method == 'PATCH':
+                record = await self.write(_update, table, row_id, _fields(table, body, partial=True))
+            elif method == 'DELETE':
+                if await self.write(_delete, table, row_id):
+                    return 204, None
+                record = None
+            else:
+                raise HTTPError(405, f"{method} not allowed on /{table}/{{id}}")
+            if record is None:
+                raise HTTPError(404, f"no {table} row with id {row_id}")
+            return 200, record
+
+        if path in ('/equip', '/unequip', '/battle-power', '/battle'):
+            if method != 'POST':
+                raise HTTPError(405, f"use POST for {path}")
+            if path == '/equip':
+                characters, armors = _names(body, 'characters', 'armors')
+                return 200, {'created': await self.write(
+                    lambda roster: roster.equipment.equip(characters, armors))}
+            if path == '/unequip':
+                characters, armors = _names(body, 'characters', 'armors')
+                return 200, {'removed': await self.write(
+                    lambda roster: roster.equipment.unequip(characters, armors))}
+            characters, monsters = _names(body, 'characters', 'monsters')
+            if path == '/battle-power':
+                char_powers, monster_powers = await self.read(
+                    lambda roster: roster.battle.battle_powers(characters, monsters))
+                return 200, {'characters': char_powers, 'monsters': monster_powers}
+            char_modifier = _int(body.get('char_modifier', 0), 'char_modifier')
+            monster_modifier = _int(body.get('monster_modifier', 0), 'monster_modifier')
+            result = await self.read(lambda roster: roster.battle.calculate_battle(
+                characters, monsters, char_modifier, monster_modifier))
+            return 200, result._asdict()
+
+        raise HTTPError(404, f"no route for {path}")
+
+    async def stream(self, writer, table, after, keep_alive):
+        """Send every row after ``after`` as one JSON array, a page per chunk."""
+        writer.write((f"HTTP/1.1 200 OK\r\n"
+                      f"Content-Type: application/json\r\n"
+                      f"Transfer-Encoding: chunked\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1'))
+        separator = '['
+        while True:
+            try:
+                rows = await self.read(lambda roster: getattr(roster, table).page(after, self.stream_page))
+            except Exception as error:
+                # Too late for an error status; cut the response short instead
+                log.exception("streaming %s failed", table)
+                raise ConnectionAbortedError(str(error)) from error
+            text = ''.join(f"{separator if i == 0 else ','}{json.dumps({'id': row_id, 'name': name})}"
+                           for i, (row_id, name) in enumerate(rows))
+            if rows:
+                separator = ','
+                after = rows[-1][0]
+            if len(rows) < self.stream_page:
+                text += '[]' if separator == '[' else ']'
+            data = text.encode()
+            writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+            await writer.drain()
+            if len(rows) < self.stream_page:
+                break
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+async def serve(worker, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    """Serve the API until cancelled; ``ready(server)`` is called once listening."""
+    server = await asyncio.start_server(Server(worker).handle, host, port)
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m trpgs4.server', description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='database file (default: $TRPGS4_DB or rpg_characters.db)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), help='connection profile')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--readers', type=int, default=DEFAULT_READERS,
+                        help='reader threads, one connection each')
+    args = parser.parse_args(argv)
+
+    def ready(server):
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"serving on http://{host}:{port}", file=sys.stderr)
+
+    worker = DatabaseWorker(args.db, args.profile, readers=args.readers)
+    try:
+        asyncio.run(serve(worker, args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+
+if __name__ == '__main__':
+    main()
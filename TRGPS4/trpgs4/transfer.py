@@ -0,0 +1,421 @@
+"""Streaming CSV / JSON Lines import and export.
+
+Records are read and written one at a time through generators, so memory
+stays flat however large the file is. Imports are written in batches of
+``batch_size`` rows, one transaction per batch.
+
+Tables and their columns::
+
+    characters       name, description, level
+    armors           name, description, bonus
+    monsters         name, description, battle_power
+    character_armor  character, armor   (names; or character_id, armor_id)
+
+Exports also carry each row's ``id``; imports ignore it for entity tables.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import sqlite3
+import sys
+import time
+
+from .db import PROFILES, connect
+from .repository import DuplicateNameError
+
+DEFAULT_BATCH_SIZE = 5000
+
+ENTITY_COLUMNS = {
+    'characters': ('name', 'description', 'level'),
+    'armors': ('name', 'description', 'bonus'),
+    'monsters': ('name', 'description', 'battle_power'),
+}
+INTEGER_DEFAULTS = {'level': 1, 'bonus': 0, 'battle_power': 1}
+LINK_TABLE = 'character_armor'
+TABLES = (*ENTITY_COLUMNS, LINK_TABLE)
+FORMATS = ('csv', 'jsonl')
+
+# What to do when an imported name already exists
+ON_CONFLICT = {
+    'abort': '',
+    'skip': ' ON CONFLICT(name) DO NOTHING',
+    'update': ' ON CONFLICT(name) DO UPDATE SET {assignments}',
+}
+
+
+class TransferError(ValueError):
+    """An import record that cannot be written."""
+
+    def __init__(self, line, message):
+        super().__init__(f"record {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+class TransferStats:
+    """Running totals of an import or export, passed to progress callbacks."""
+
+    def __init__(self, table):
+        self.table = table
+        self.rows = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def tick(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'table': self.table,
+            'rows': self.rows,
+            'skipped': self.skipped,
+            'errors': [str(error) for error in self.errors],
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_sec': round(self.rows_per_sec, 1),
+        }
+
+
+def guess_format(filename):
+    return 'csv' if str(filename).lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(fp, fmt):
+    """Yield one dict per record from an open text file.
+
+    A JSON Lines record that does not parse or is not an object raises
+    ``TransferError`` numbered like the records before it.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(fp)
+    elif fmt == 'jsonl':
+        records = (text for text in fp if text.strip())
+        for line, text in enumerate(records, start=1):
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as error:
+                raise TransferError(line, f"invalid JSON: {error.msg}") from None
+            if not isinstance(record, dict):
+                raise TransferError(line, "record must be an object")
+            yield record
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+
+def _write_records(fp, fmt, columns, rows):
+    # Writes each row as it is pulled, passing it through for counting
+    if fmt == 'csv':
+        writer = csv.writer(fp)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            yield row
+    elif fmt == 'jsonl':
+        for row in rows:
+            fp.write(json.dumps(dict(zip(columns, row))) + '\n')
+            yield row
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+
+def _export_query(table):
+    if table == LINK_TABLE:
+        columns = ('character_id', 'armor_id', 'character', 'armor')
+        sql = '''SELECT character_armor.character_id, character_armor.armor_id,
+                        characters.name, armors.name
+                 FROM character_armor
+                 JOIN characters ON characters.id = character_armor.character_id
+                 JOIN armors ON armors.id = character_armor.armor_id'''
+    else:
+        columns = ('id', *ENTITY_COLUMNS[table])
+        sql = f"SELECT {', '.join(columns)} FROM {table} ORDER BY id"
+    return columns, sql
+
+
+def export_table(conn, table, fp, fmt, progress=None, progress_every=DEFAULT_BATCH_SIZE):
+    """Stream every row of ``table`` to ``fp``; returns the final ``TransferStats``."""
+    if table not in TABLES:
+        raise ValueError(f"unknown table {table!r}")
+    columns, sql = _export_query(table)
+    stats = TransferStats(table)
+    for _ in _write_records(fp, fmt, columns, conn.execute(sql)):
+        stats.rows += 1
+        if progress and stats.rows % progress_every == 0:
+            stats.tick()
+            progress(stats)
+    stats.tick()
+    if progress:
+        progress(stats)
+    return stats
+
+
+def _integer(line, column, value):
+    # JSON booleans and fractional numbers would otherwise be stored as 1 or truncated
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, str)) and not isinstance(value, bool):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise TransferError(line, f"{column} must be an integer, not {value!r}")
+
+
+def entity_row(table, line, record):
+    """Validate ``record`` as a row of ``table``, as a tuple in ``ENTITY_COLUMNS`` order.
+
+    Raises ``TransferError`` for record ``line`` if a field is missing or of the wrong type.
+    """
+    row = []
+    for column in ENTITY_COLUMNS[table]:
+        value = record.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        if column in INTEGER_DEFAULTS:
+            if value in (None, ''):
+                value = INTEGER_DEFAULTS[column]
+            value = _integer(line, column, value)
+        elif value in (None, ''):
+            raise TransferError(line, f"{column} is required")
+        elif not isinstance(value, str):
+            raise TransferError(line, f"{column} must be text, not {value!r}")
+        row.append(value)
+    return tuple(row)
+
+
+def _link_key(line, record, side):
+    name = record.get(side)
+    if name not in (None, ''):
+        return 'name', str(name)
+    row_id = record.get(f'{side}_id')
+    try:
+        return 'id', int(row_id)
+    except (TypeError, ValueError):
+        raise TransferError(line, f"{side} or {side}_id is required") from None
+
+
+def _batches(records, batch_size):
+    batch = []
+    for line, record in enumerate(records, start=1):
+        batch.append((line, record))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _lookup(conn, table, keys):
+    """Map ``('name', x)``/``('id', x)`` keys of ``table`` to ids with one query."""
+    names = [value for kind, value in keys if kind == 'name']
+    ids = [value for kind, value in keys if kind == 'id']
+    found = {}
+    cur = conn.execute(
+        f'''SELECT 'name', name, id FROM {table} WHERE name IN (SELECT value FROM json_each(?))
+            UNION ALL
+            SELECT 'id', id, id FROM {table} WHERE id IN (SELECT value FROM json_each(?))''',
+        (json.dumps(names), json.dumps(ids)))
+    for kind, key, row_id in cur:
+        found[kind, key] = row_id
+    return found
+
+
+def _link_rows(conn, batch, stats, strict):
+    keyed = []
+    for line, record in batch:
+        try:
+            keyed.append((line, _link_key(line, record, 'character'), _link_key(line, record, 'armor')))
+        except TransferError as error:
+            if strict:
+                raise
+            stats.errors.append(error)
+    characters = _lookup(conn, 'characters', [character for _, character, _ in keyed])
+    armors = _lookup(conn, 'armors', [armor for _, _, armor in keyed])
+
+    rows = []
+    for line, character, armor in keyed:
+        if character not in characters or armor not in armors:
+            missing = character if character not in characters else armor
+            error = TransferError(line, f"no such {'character' if missing is character else 'armor'} "
+                                        f"{missing[1]!r}")
+            if strict:
+                raise error
+            stats.errors.append(error)
+            continue
+        rows.append((characters[character], armors[armor]))
+    return rows
+
+
+def _entity_rows(table, batch, stats, strict):
+    # ``(line, row)`` pairs, so conflicts can be traced back to their record
+    rows = []
+    for line, record in batch:
+        try:
+            rows.append((line, entity_row(table, line, record)))
+        except TransferError as error:
+            if strict:
+                raise
+            stats.errors.append(error)
+    return rows
+
+
+def _name_conflicts(conn, table, rows, seen):
+    """``TransferError``s for names in ``rows`` that exist in ``table`` or repeat one in ``seen``.
+
+    Names are looked up in one query; ``seen`` collects the batch's names.
+    """
+    taken = set(conn.execute(
+        f"SELECT name FROM {table} WHERE name IN (SELECT value FROM json_each(?))",
+        (json.dumps([row[0] for line, row in rows]),)).fetchall())
+    errors = []
+    for line, row in rows:
+        name = row[0]
+        if (name,) in taken:
+            errors.append(TransferError(line, f"{name!r} already exists"))
+        elif name in seen:
+            errors.append(TransferError(line, f"{name!r} appears earlier in the file"))
+        seen.add(name)
+    return errors
+
+
+def import_records(conn, table, records, batch_size=DEFAULT_BATCH_SIZE, on_conflict='abort',
+                   dry_run=False, progress=None):
+    """Insert dict ``records`` into ``table`` in batches of ``batch_size`` rows.
+
+    Every batch is one transaction; an invalid record raises ``TransferError``
+    after the batches before it were committed. ``on_conflict`` decides what
+    happens to names that already exist: "abort" raises
+    ``DuplicateNameError``, "skip" keeps the existing row and "update"
+    overwrites it. With ``dry_run`` nothing is written; every record is
+    validated (link names resolved against the database; with "abort", names
+    checked against the table and earlier records) and all problems are
+    collected in the returned stats' ``errors``. ``progress(stats)`` is called
+    after each batch.
+    """
+    if table not in TABLES:
+        raise ValueError(f"unknown table {table!r}")
+    if on_conflict not in ON_CONFLICT:
+        raise ValueError(f"on_conflict must be one of {', '.join(ON_CONFLICT)}")
+
+    if table == LINK_TABLE:
+        # Links already present are counted as skipped
+        sql = "INSERT OR IGNORE INTO character_armor (character_id, armor_id) VALUES (?, ?)"
+    else:
+        columns = ENTITY_COLUMNS[table]
+        assignments = ', '.join(f"{column}=excluded.{column}" for column in columns[1:])
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+               + ON_CONFLICT[on_conflict].format(assignments=assignments))
+
+    stats = TransferStats(table)
+    # Names of earlier records, for spotting repeats in a dry run
+    seen = set()
+    for batch in _batches(records, batch_size):
+        lines = None
+        if table == LINK_TABLE:
+            rows = _link_rows(conn, batch, stats, strict=not dry_run)
+        else:
+            lines = _entity_rows(table, batch, stats, strict=not dry_run)
+            rows = [row for line, row in lines]
+
+        if dry_run:
+            if lines is not None and on_conflict == 'abort':
+                conflicts = _name_conflicts(conn, table, lines, seen)
+                stats.errors.extend(conflicts)
+                stats.rows += len(rows) - len(conflicts)
+            else:
+                stats.rows += len(rows)
+        else:
+            try:
+                with conn:
+                    written = conn.executemany(sql, rows).rowcount
+            except sqlite3.IntegrityError as error:
+                if table == LINK_TABLE:
+                    raise
+                # The batch was rolled back; find the record that clashed
+                conflicts = _name_conflicts(conn, table, lines, set())
+                raise DuplicateNameError(str(conflicts[0]) if conflicts else
+                                         f"batch ending at record {batch[-1][0]}") from error
+            stats.rows += written
+            stats.skipped += len(rows) - written
+        stats.tick()
+        if progress:
+            progress(stats)
+    stats.tick()
+    return stats
+
+
+def import_file(conn, table, fp, fmt, **kwargs):
+    """``import_records`` over the records of an open text file."""
+    return import_records(conn, table, read_records(fp, fmt), **kwargs)
+
+
+@contextlib.contextmanager
+def _open(filename, mode):
+    if filename == '-':
+        yield sys.stdin if 'r' in mode else sys.stdout
+    else:
+        with open(filename, mode, newline='', encoding='utf-8') as fp:
+            yield fp
+
+
+def _report(stats):
+    print(f"\r{stats.table}: {stats.rows} rows, {stats.rows_per_sec:,.0f} rows/s",
+          end='', file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m trpgs4.transfer',
+                                     description='Bulk import and export of roster tables.')
+    parser.add_argument('--db', help='database file (default: $TRPGS4_DB or rpg_characters.db)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), help='connection profile')
+    parser.add_argument('--format', choices=FORMATS, help='file format (default: from the file name)')
+    parser.add_argument('--quiet', action='store_true', help='no progress on stderr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help='load records from a file ("-" for stdin)')
+    importer.add_argument('table', choices=TABLES)
+    importer.add_argument('file')
+    importer.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    importer.add_argument('--on-conflict', choices=ON_CONFLICT, default='abort')
+    importer.add_argument('--dry-run', action='store_true', help='validate without writing')
+
+    exporter = commands.add_parser('export', help='write a table to a file ("-" for stdout)')
+    exporter.add_argument('table', choices=TABLES)
+    exporter.add_argument('file')
+
+    args = parser.parse_args(argv)
+    fmt = args.format or guess_format(args.file)
+    progress = None if args.quiet else _report
+    conn = connect(args.db, args.profile)
+    try:
+        if args.command == 'import':
+            with _open(args.file, 'r') as fp:
+                stats = import_file(conn, args.table, fp, fmt, batch_size=args.batch_size,
+                                    on_conflict=args.on_conflict, dry_run=args.dry_run,
+                                    progress=progress)
+        else:
+            with _open(args.file, 'w') as fp:
+                stats = export_table(conn, args.table, fp, fmt, progress=progress)
+    except (TransferError, DuplicateNameError) as error:
+        if progress:
+            print(file=sys.stderr)
+        print(f"{args.table}: {error}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    if progress:
+        print(file=sys.stderr)
+    # Keep stdout clean when it carries the exported records
+    out = sys.stderr if args.command == 'export' and args.file == '-' else sys.stdout
+    print(json.dumps(stats.as_dict()), file=out)
+    return 1 if stats.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Tk widgets used by the GUI client.
+
+This is the only module in the package that imports tkinter; the data layer
+never imports it.
+"""
+import bisect
+import contextvars
+import queue
+from tkinter import END
+
+from .repository import PAGE_SIZE
+
+PREFETCH_ROWS = 25
+POLL_MS = 15
+
+
+class VirtualList:
+    """Drives a Listbox from a keyset-paginated row source.
+
+    ``fetch_page(after_id, limit, deliver)`` must eventually call
+    ``deliver(rows)`` with up to ``limit`` ``(id, text)`` rows whose ids are
+    greater than ``after_id``, in id order; it may do so asynchronously.
+    Only the first page is loaded up front; the next one is requested when
+    the view scrolls within ``prefetch`` rows of the end of what is loaded.
+    Every row keeps its id, so the selection maps back to the database row
+    rather than its name, and ``apply`` can patch single rows in place.
+    """
+
+    def __init__(self, listbox, scrollbar, fetch_page, page_size=PAGE_SIZE, prefetch=PREFETCH_ROWS):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.ids = []
+        self.exhausted = False
+        self.loading = False
+        # Showing a fixed list of rows (``show``) rather than pages in id order
+        self.fixed = False
+        # Bumped whenever the contents are replaced so late pages are dropped
+        self.generation = 0
+        listbox.config(yscrollcommand=self.on_scroll)
+
+    def reset(self, fetch_page=None):
+        """Drop every row and start again from the first page."""
+        if fetch_page is not None:
+            self.fetch_page = fetch_page
+        self.clear()
+        self.load_more()
+
+    def show(self, rows):
+        """Replace the contents with a fixed list of ``(id, text)`` rows, e.g. search hits."""
+        self.clear()
+        self.fixed = True
+        self.append(rows, exhausted=True)
+
+    def clear(self):
+        self.listbox.delete(0, END)
+        self.ids = []
+        self.exhausted = False
+        self.loading = False
+        self.fixed = False
+        self.generation += 1
+
+    def append(self, rows, exhausted=None):
+        rows = list(rows)
+        if rows:
+            self.ids.extend(row_id for row_id, text in rows)
+            self.listbox.insert(END, *(text for row_id, text in rows))
+        self.exhausted = len(rows) < self.page_size if exhausted is None else exhausted
+
+    def index(self, row_id):
+        """Position of row ``row_id`` in the list, or None if it is not loaded."""
+        if self.fixed:
+            return self.ids.index(row_id) if row_id in self.ids else None
+        index = bisect.bisect_left(self.ids, row_id)
+        return index if index < len(self.ids) and self.ids[index] == row_id else None
+
+    def apply(self, rows, deleted=()):
+        """Patch in ``(id, text)`` rows that were added or changed and drop ``deleted`` ids.
+
+        New rows beyond the loaded pages are left for ``load_more``, and a
+        fixed list only updates or drops the rows it already shows. The
+        selection stays on its row.
+        """
+        selected = self.selected_id()
+        for row_id in deleted:
+            index = self.index(row_id)
+            if index is not None:
+                del self.ids[index]
+                self.listbox.delete(index)
+        for row_id, text in rows:
+            index = self.index(row_id)
+            if index is not None:
+                if self.listbox.get(index) == text:
+                    continue
+                self.listbox.delete(index)
+            elif self.fixed or not (self.exhausted or self.ids and row_id < self.ids[-1]):
+                continue
+            else:
+                index = bisect.bisect_left(self.ids, row_id)
+                self.ids.insert(index, row_id)
+            self.listbox.insert(index, text)
+        if selected is not None and self.selected_id() != selected:
+            index = self.index(selected)
+            if index is not None:
+                self.listbox.selection_set(index)
+
+    def load_more(self):
+        if self.exhausted or self.loading:
+            return
+        self.loading = True
+        generation = self.generation
+
+        def deliver(rows):
+            if generation != self.generation:
+                return
+            self.loading = False
+            self.append(rows)
+
+        after_id = self.ids[-1] if self.ids else 0
+        self.fetch_page(after_id, self.page_size, deliver)
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.exhausted or not self.ids:
+            return
+        last_visible = float(last) * len(self.ids)
+        if last_visible >= len(self.ids) - self.prefetch:
+            self.load_more()
+
+    def selected_id(self):
+        selection = self.listbox.curselection()
+        if not selection:
+            return None
+        return self.ids[selection[0]]
+
+
+class TkDispatcher:
+    """Runs ``DatabaseWorker`` calls and hands their results back to the Tk thread.
+
+    Finished futures are collected on a queue that is drained with
+    ``root.after`` while anything is outstanding, so callbacks always run on
+    the Tk thread and the event loop never waits on SQLite.
+    ``on_busy(busy)`` is told when work starts and when it has all finished.
+    Callbacks run in the context the call was made from.
+    """
+
+    def __init__(self, root, worker, on_busy=None, on_error=None, poll_ms=POLL_MS):
+        self.root = root
+        self.worker = worker
+        self.on_busy = on_busy
+        self.on_error = on_error
+        self.poll_ms = poll_ms
+        self.pending = 0
+        self.done = queue.SimpleQueue()
+
+    def read(self, fn, *args, then=None, failed=None):
+        self.call(fn, *args, then=then, failed=failed)
+
+    def write(self, fn, *args, then=None, failed=None):
+        self.call(fn, *args, write=True, then=then, failed=failed)
+
+    def call(self, fn, *args, write=False, then=None, failed=None):
+        future = self.worker.submit(fn, *args, write=write)
+        self.pending += 1
+        if self.pending == 1:
+            if self.on_busy:
+                self.on_busy(True)
+            self.root.after(self.poll_ms, self.poll)
+        context = contextvars.copy_context()
+        future.add_done_callback(lambda f: self.done.put((f, then, failed, context)))
+
+    def poll(self):
+        while not self.done.empty():
+            future, then, failed, context = self.done.get()
+            self.pending -= 1
+            error = future.exception()
+            try:
+                if error is None:
+                    if then is not None:
+                        context.run(then, future.result())
+                elif failed is not None:
+                    context.run(failed, error)
+                else:
+                    self.report(error)
+            except Exception as callback_error:
+                # A broken callback must not stop later results from arriving
+                self.report(callback_error)
+        if self.pending:
+            self.root.after(self.poll_ms, self.poll)
+        elif self.on_busy:
+            self.on_busy(False)
+
+    def report(self, error):
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            self.root.report_callback_exception(type(error), error, error.__traceback__)
@@ -0,0 +1,69 @@
+"""Background execution of roster calls.
+
+``DatabaseWorker`` owns one writer thread and a few reader threads, each with
+its own connection to the same database file. Calls are plain functions of a
+``Roster``; ``submit`` returns a ``concurrent.futures.Future`` so any front
+end can wait on or poll for the result. Calls run in a copy of the
+submitter's ``contextvars`` context, so instrumentation attributes their
+queries to the user action that started them.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .db import configured_path, connect
+from .roster import Roster
+
+DEFAULT_READERS = 2
+
+
+class DatabaseWorker:
+    """Runs ``fn(roster, *args)`` off the calling thread.
+
+    Writes go to a single writer thread so they are applied in submission
+    order; reads are spread over ``readers`` threads. The database must be a
+    file, since every thread opens its own connection.
+    """
+
+    def __init__(self, path=None, profile=None, readers=DEFAULT_READERS, instrumentation=None):
+        self.path = configured_path(path)
+        self.profile = profile
+        self.instrumentation = instrumentation
+        # Migrate once here so the worker threads never race to upgrade the schema.
+        connect(self.path, profile).close()
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='trpgs4-writer',
+                                          initializer=self._open)
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix='trpgs4-reader',
+                                           initializer=self._open)
+
+    def _open(self):
+        conn = connect(self.path, self.profile, self.instrumentation, check_same_thread=False)
+        with self._lock:
+            self._connections.append(conn)
+        self._local.roster = Roster(conn)
+
+    def _call(self, fn, args):
+        return fn(self._local.roster, *args)
+
+    def submit(self, fn, *args, write=False):
+        executor = self._writer if write else self._readers
+        return executor.submit(contextvars.copy_context().run, self._call, fn, args)
+
+    def read(self, fn, *args):
+        return self.submit(fn, *args)
+
+    def write(self, fn, *args):
+        return self.submit(fn, *args, write=True)
+
+    def close(self):
+        """Finish every queued call, then close all connections."""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
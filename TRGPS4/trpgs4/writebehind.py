@@ -0,0 +1,55 @@
+"""Write-behind buffering for rapid field edits."""
+import threading
+
+
+class WriteBuffer:
+    """Collects row edits and applies them later in a single transaction.
+
+    Repeated edits of the same column of the same row collapse to the latest
+    value, so holding a Spinbox arrow down costs one UPDATE per row when the
+    buffer is flushed rather than one commit per tick. The buffer is safe to
+    fill from one thread while another flushes it.
+    """
+
+    def __init__(self):
+        self._edits = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._edits)
+
+    def set(self, table, row_id, **values):
+        """Record new ``values`` for row ``row_id`` of ``table`` ("characters", "armors" or "monsters")."""
+        with self._lock:
+            self._edits.setdefault((table, row_id), {}).update(values)
+
+    def take(self):
+        """Remove and return every pending edit as ``{(table, row_id): {column: value}}``."""
+        with self._lock:
+            edits, self._edits = self._edits, {}
+        return edits
+
+    def restore(self, edits):
+        """Put back ``edits`` that could not be written, under any newer ones."""
+        with self._lock:
+            for key, values in edits.items():
+                self._edits[key] = {**values, **self._edits.get(key, {})}
+
+    def flush(self, roster):
+        """Write every pending edit through ``roster`` in one transaction.
+
+        Returns the pending edits that were written; on failure they are put
+        back into the buffer before the error propagates.
+        """
+        edits = self.take()
+        if not edits:
+            return edits
+        try:
+            with roster.conn:
+                for (table, row_id), values in edits.items():
+                    getattr(roster, table).set_fields(row_id, values)
+        except BaseException:
+            self.restore(edits)
+            raise
+        return edits